@@ -0,0 +1,212 @@
+import argparse
+import json
+import platform
+import random
+import statistics
+import sys
+import time
+
+import checkpoint
+import tracing
+from minesweeper import Minesweeper, MinesweeperAI
+
+SIZES = ((8, 8), (16, 16), (16, 30), (100, 100))
+DENSITIES = (0.10, 0.15, 0.20)
+
+# Share of the safe cells revealed in the mid-game position most benchmarks start from
+PROGRESS = 0.3
+
+
+def mid_game(height, width, mines, seed):
+    """A seeded game, and an AI that has revealed about PROGRESS of its safe cells.
+
+    The AI plays its own safe moves, but guesses are replaced by a random
+    safe cell so the game never ends early. Cells are revealed one at a
+    time (no cascade) so that play stops right at PROGRESS, with the
+    frontier still open. Returns `(game, ai, observations)`, the
+    observations in the order the AI received them.
+    """
+    rng = random.Random(seed)
+    game = Minesweeper(height=height, width=width, mines=mines, rng=rng)
+    ai = MinesweeperAI(height=height, width=width, mines=mines, rng=rng)
+
+    target = PROGRESS * (height * width - mines)
+    revealed = {}
+    observations = []
+    while len(revealed) < target:
+        move = ai.make_safe_move()
+        if move is None:
+            move = rng.choice([cell for cell in ai.unknowns if not game.is_mine(cell)])
+        revealed[move] = game.nearby_mines(move)
+        observations.append((move, revealed[move]))
+        ai.add_knowledge(move, revealed[move])
+
+    return game, ai, observations
+
+
+def measure(run, setup=None, repeat=5):
+    """Seconds taken by `run(state)` in each of `repeat` runs.
+
+    `setup()` builds a fresh state for every run and is not timed.
+    """
+    times = []
+    for _ in range(repeat):
+        state = setup() if setup is not None else None
+        start = time.perf_counter()
+        run(state)
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def bench_board(height, width, mines, seed):
+    # name -> (setup, run, operations per run)
+    game, ai, observations = mid_game(height, width, mines, seed)
+    snapshot = checkpoint.dumps(ai)
+    cells = [(i, j) for i in range(height) for j in range(width)]
+    safe_unknowns = [cell for cell in ai.unknowns if not game.is_mine(cell)]
+
+    def construct(_):
+        Minesweeper(height=height, width=width, mines=mines, rng=random.Random(seed))
+
+    def nearby_mines(_):
+        for cell in cells:
+            game.nearby_mines(cell)
+
+    def fresh_ai():
+        return MinesweeperAI(height=height, width=width, mines=mines, rng=random.Random(seed))
+
+    def add_knowledge(fresh):
+        for cell, count in observations:
+            fresh.add_knowledge(cell, count)
+
+    def add_knowledge_batch(fresh):
+        fresh.add_knowledge_batch(observations)
+
+    def restored():
+        # Seeded like the original, so random moves are reproducible
+        return checkpoint.loads(snapshot, rng=random.Random(seed))
+
+    def use_inference(restored_ai):
+        # Drain the worklist through __use_inference alone: resolved sentences
+        # mark their cells, which queues (and often resolves) their neighbours
+        use = restored_ai._MinesweeperAI__use_inference
+        pending = restored_ai.pending
+        calls = 0
+        while pending:
+            sentence = pending.popleft()
+            restored_ai.queued.discard(sentence)
+            if sentence in restored_ai.knowledge:
+                use(sentence)
+                calls += 1
+        return calls
+
+    def create_new_knowledge(observed_ai):
+        observed_ai._MinesweeperAI__create_new_knowledge()
+
+    def observed():
+        # The position as add_knowledge_batch leaves it before inference:
+        # every revealed cell marked and its sentence queued, none used yet
+        fresh = fresh_ai()
+        for cell, _ in observations:
+            fresh.moves_made.add(cell)
+            fresh.mark_safe(cell)
+        observe = fresh._MinesweeperAI__observe
+        for cell, count in observations:
+            observe(cell, count)
+        return fresh
+
+    def pairs_compared():
+        # Sentence pairs the inference compares from the observed position
+        counting = observed()
+        counting.tracer = tracing.Tracer(stats=True)
+        create_new_knowledge(counting)
+        return counting.tracer.counters.get("pairs_compared", 0)
+
+    def with_safes():
+        restored_ai = restored()
+        for cell in safe_unknowns:
+            restored_ai.mark_safe(cell)
+        return restored_ai
+
+    def make_safe_move(restored_ai):
+        while restored_ai.make_safe_move() is not None:
+            pass
+
+    def make_random_move(restored_ai):
+        restored_ai.make_random_move()
+
+    return {
+        "construct": (None, construct, 1),
+        "nearby_mines": (None, nearby_mines, len(cells)),
+        "add_knowledge": (fresh_ai, add_knowledge, len(observations)),
+        "add_knowledge_batch": (fresh_ai, add_knowledge_batch, len(observations)),
+        "use_inference": (observed, use_inference, use_inference(observed())),
+        "create_new_knowledge": (observed, create_new_knowledge, pairs_compared()),
+        "make_safe_move": (with_safes, make_safe_move, len(safe_unknowns)),
+        "make_random_move": (restored, make_random_move, 1),
+    }
+
+
+def run(sizes=SIZES, densities=DENSITIES, seed=0, repeat=5, only=None):
+    """Run every benchmark on every board, as a list of result dicts."""
+    results = []
+    for height, width in sizes:
+        for density in densities:
+            mines = round(height * width * density)
+            benches = bench_board(height, width, mines, seed)
+            for name, (setup, body, operations) in benches.items():
+                if only and name not in only:
+                    continue
+                times = measure(body, setup, repeat)
+                best = min(times)
+                results.append({
+                    "benchmark": name,
+                    "height": height,
+                    "width": width,
+                    "mines": mines,
+                    "density": density,
+                    "seed": seed,
+                    "repeat": repeat,
+                    "operations": operations,
+                    "best": best,
+                    "median": statistics.median(times),
+                    "best_per_operation": best / operations if operations else 0.0,
+                })
+    return results
+
+
+def _size(text):
+    height, _, width = text.partition("x")
+    return int(height), int(width)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the board and solver hot paths, as JSON.")
+    parser.add_argument("--sizes", type=lambda text: [_size(size) for size in text.split(",")],
+                        default=SIZES, help="comma separated HEIGHTxWIDTH boards, e.g. 8x8,16x30")
+    parser.add_argument("--densities", type=lambda text: [float(d) for d in text.split(",")],
+                        default=DENSITIES, help="comma separated mine densities")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per benchmark (best is kept)")
+    parser.add_argument("--only", default=None, help="comma separated benchmark names")
+    parser.add_argument("--output", default=None, help="write the JSON here instead of stdout")
+    args = parser.parse_args()
+
+    only = set(args.only.split(",")) if args.only else None
+    report = {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "machine": platform.machine(),
+        "results": run(args.sizes, args.densities, args.seed, args.repeat, only),
+    }
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=1)
+    else:
+        json.dump(report, sys.stdout, indent=1)
+        print()
+
+
+if __name__ == "__main__":
+    main()
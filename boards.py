@@ -0,0 +1,117 @@
+import random
+
+import numpy as np
+
+import tracing
+from minesweeper import Minesweeper
+from tracing import DEBUG
+
+# Offsets of the 8 neighbours of a cell
+NEIGHBOR_OFFSETS = [(di, dj) for di in (-1, 0, 1) for dj in (-1, 0, 1) if (di, dj) != (0, 0)]
+
+
+def neighbor_counts(board: np.ndarray) -> np.ndarray:
+    """Number of mines around every cell of a boolean mine grid.
+
+    A 3x3 box sum without its centre, computed separably: neighbours in the
+    row, then in the column of those row sums, then minus the cell itself.
+    Works on stacks of boards too: only the last two axes are rows and columns.
+    """
+    cells = board.astype(np.uint8)
+    rows = cells.copy()
+    rows[..., :, 1:] += cells[..., :, :-1]
+    rows[..., :, :-1] += cells[..., :, 1:]
+    box = rows.copy()
+    box[..., 1:, :] += rows[..., :-1, :]
+    box[..., :-1, :] += rows[..., 1:, :]
+    return box - cells
+
+
+def _check_mines(height, width, mines):
+    if not 0 <= mines <= height * width:
+        raise ValueError(f"cannot place {mines} mines on a {height}x{width} board")
+
+
+class ArrayMinesweeper(Minesweeper):
+    """Minesweeper board kept in compact NumPy arrays.
+
+    The mine grid is a bool array and the neighbour counts, computed once for
+    the whole board at construction, a uint8 array: about 2 bytes per cell,
+    so million-cell boards are cheap. `nearby_mines` and `is_mine` are single
+    array lookups and the `mines` set is only built when asked for.
+
+    Mines are sampled without replacement by a NumPy generator seeded with
+    `seed`, or with a seed drawn from `rng` (the `random` module by default)
+    so that seeding it still makes boards reproducible.
+    """
+
+    def __init__(self, height=4, width=4, mines=4, tracer=None, seed=None, rng=None):
+        _check_mines(height, width, mines)
+
+        self.tracer = tracer or tracing.DEFAULT
+        self.height = height
+        self.width = width
+
+        if seed is None:
+            seed = (rng or random).getrandbits(64)
+        rng = np.random.default_rng(seed)
+
+        board = np.zeros(height * width, dtype=bool)
+        board[rng.choice(height * width, size=mines, replace=False)] = True
+        self.board = board.reshape(height, width)
+        self.counts = neighbor_counts(self.board)
+
+        self._mines = None
+        if self.tracer.level >= DEBUG:
+            self.tracer.log(DEBUG, "mines: %s", self.mines)
+        self.mines_found = set()
+
+    @property
+    def mines(self):
+        if self._mines is None:
+            self._mines = set(zip(*(axis.tolist() for axis in np.nonzero(self.board))))
+        return self._mines
+
+    def is_mine(self, cell):
+        return bool(self.board[cell])
+
+    def nearby_mines(self, cell):
+        return int(self.counts[cell])
+
+
+class SparseMinesweeper(Minesweeper):
+    """Minesweeper board storing nothing but the set of mines.
+
+    Memory grows with the number of mines, not the number of cells, which
+    suits huge, sparsely mined boards. `nearby_mines` looks up the 8
+    neighbours in the mine set. Mines are sampled without replacement from
+    `rng` (the `random` module by default), or from `random.Random(seed)`
+    when a seed is given.
+    """
+
+    def __init__(self, height=4, width=4, mines=4, tracer=None, seed=None, rng=None):
+        _check_mines(height, width, mines)
+
+        self.tracer = tracer or tracing.DEFAULT
+        self.height = height
+        self.width = width
+
+        if seed is not None:
+            rng = random.Random(seed)
+        rng = rng or random
+        self.mines = {divmod(index, width) for index in rng.sample(range(height * width), mines)}
+
+        self.tracer.log(DEBUG, "mines: %s", self.mines)
+        self.mines_found = set()
+
+    def is_mine(self, cell):
+        return cell in self.mines
+
+    def nearby_mines(self, cell):
+        i, j = cell
+        count = 0
+        for di, dj in NEIGHBOR_OFFSETS:
+            neighbor = (i + di, j + dj)
+            if neighbor in self.mines:
+                count += 1
+        return count
@@ -0,0 +1,185 @@
+import functools
+import struct
+import sys
+from array import array
+
+import tracing
+from minesweeper import BitSentence, Minesweeper, MinesweeperAI, Sentence
+
+# Every checkpoint starts with MAGIC, a format version and a kind byte
+MAGIC = b"MSCP"
+VERSION = 1
+
+GAME = b"G"
+AI = b"A"
+
+_HEADER = struct.Struct("<4sBc")
+_GAME = struct.Struct("<HH")
+# height, width, total mines (-1: unknown), sentence representation, backend
+_AI = struct.Struct("<HHiBB")
+_LENGTH = struct.Struct("<I")
+
+_SENTENCES = ("set", "bitset")
+_BACKENDS = ("pairwise", "matrix")
+
+
+def _write_array(parts, typecode, values):
+    # Length-prefixed little-endian array
+    values = array(typecode, values)
+    if sys.byteorder == "big":
+        values.byteswap()
+    parts.append(_LENGTH.pack(len(values)))
+    parts.append(values.tobytes())
+
+
+def _read_array(data, offset, typecode):
+    (length,) = _LENGTH.unpack_from(data, offset)
+    offset += _LENGTH.size
+    values = array(typecode)
+    end = offset + length * values.itemsize
+    if end > len(data):
+        raise ValueError("truncated checkpoint")
+    values.frombytes(data[offset:end])
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values, end
+
+
+def _indices(cells, width):
+    return (i * width + j for i, j in cells)
+
+
+@functools.lru_cache(maxsize=4)
+def _grid(height, width):
+    # Every cell of the board, by flat index: loading looks cells up here
+    # instead of building a tuple per index
+    return tuple((i, j) for i in range(height) for j in range(width))
+
+
+def _cells(indices, grid):
+    return [grid[index] for index in indices]
+
+
+def dumps(obj) -> bytes:
+    """Encode a `Minesweeper` or `MinesweeperAI` as a compact checkpoint.
+
+    Cells are stored as flat indices `i * width + j` in uint32 arrays. For
+    the AI, the safe queue and the unknown cell pool keep their order and
+    sentences are stored as one array of counts, one of lengths and one of
+    all their cells, so a loaded AI plays exactly as the saved one would
+    from the same random state.
+    Checkpoints are taken between moves, when the inference worklist is empty.
+    """
+    parts = []
+    if isinstance(obj, MinesweeperAI):
+        width = obj.width
+        total_mines = -1 if obj.total_mines is None else obj.total_mines
+        parts.append(_HEADER.pack(MAGIC, VERSION, AI))
+        parts.append(_AI.pack(obj.height, width, total_mines,
+                              _SENTENCES.index(obj.sentences), _BACKENDS.index(obj.backend)))
+        _write_array(parts, "I", _indices(sorted(obj.moves_made), width))
+        _write_array(parts, "I", _indices(sorted(obj.mines), width))
+        _write_array(parts, "I", _indices(sorted(obj.safes), width))
+        _write_array(parts, "I", _indices(obj.safe_queue, width))
+        _write_array(parts, "I", _indices(obj.unknowns, width))
+
+        sentences = list(obj.knowledge)
+        _write_array(parts, "H", (sentence.count for sentence in sentences))
+        _write_array(parts, "H", (len(sentence) for sentence in sentences))
+        _write_array(parts, "I", (index for sentence in sentences for index in _indices(sentence, width)))
+
+    elif isinstance(obj, Minesweeper):
+        width = obj.width
+        parts.append(_HEADER.pack(MAGIC, VERSION, GAME))
+        parts.append(_GAME.pack(obj.height, width))
+        _write_array(parts, "I", _indices(sorted(obj.mines), width))
+        _write_array(parts, "I", _indices(sorted(obj.mines_found), width))
+
+    else:
+        raise TypeError(f"cannot checkpoint {type(obj).__name__}")
+
+    return b"".join(parts)
+
+
+def loads(data, tracer=None, executor=None, rng=None, patterns=None):
+    """Rebuild the `Minesweeper` or `MinesweeperAI` encoded by `dumps`.
+
+    Games always come back as a list-backed `Minesweeper` with the same
+    mines, whatever board class was saved. The tracer, executor, random
+    source and pattern cache are not part of a checkpoint and are given here
+    instead: an AI only resumes exactly with `rng` in the state it was in
+    when saved (and the same use of a pattern cache).
+    """
+    magic, version, kind = _HEADER.unpack_from(data, 0)
+    if magic != MAGIC:
+        raise ValueError("not a minesweeper checkpoint")
+    if version != VERSION:
+        raise ValueError(f"unsupported checkpoint version: {version}")
+    offset = _HEADER.size
+
+    if kind == GAME:
+        height, width = _GAME.unpack_from(data, offset)
+        offset += _GAME.size
+        grid = _grid(height, width)
+        mines, offset = _read_array(data, offset, "I")
+        mines_found, offset = _read_array(data, offset, "I")
+
+        game = Minesweeper.__new__(Minesweeper)
+        game.tracer = tracer or tracing.DEFAULT
+        game.height = height
+        game.width = width
+        game.mines = set(_cells(mines, grid))
+        game.board = [[False] * width for _ in range(height)]
+        for i, j in game.mines:
+            game.board[i][j] = True
+        game.mines_found = set(_cells(mines_found, grid))
+        return game
+
+    if kind == AI:
+        height, width, total_mines, sentences, backend = _AI.unpack_from(data, offset)
+        offset += _AI.size
+        grid = _grid(height, width)
+
+        moves_made, offset = _read_array(data, offset, "I")
+        mines, offset = _read_array(data, offset, "I")
+        safes, offset = _read_array(data, offset, "I")
+        safe_queue, offset = _read_array(data, offset, "I")
+        unknowns, offset = _read_array(data, offset, "I")
+        counts, offset = _read_array(data, offset, "H")
+        lengths, offset = _read_array(data, offset, "H")
+        cells, offset = _read_array(data, offset, "I")
+
+        # Given the saved unknown cells, the AI does not build a pool of every cell first
+        ai = MinesweeperAI(height=height, width=width, sentences=_SENTENCES[sentences], tracer=tracer,
+                           mines=None if total_mines < 0 else total_mines,
+                           backend=_BACKENDS[backend], executor=executor, rng=rng,
+                           patterns=patterns, unknowns=_cells(unknowns, grid))
+        ai.moves_made = set(_cells(moves_made, grid))
+        ai.mines = set(_cells(mines, grid))
+        ai.safes = set(_cells(safes, grid))
+        ai.safe_queue.extend(_cells(safe_queue, grid))
+
+        start = 0
+        for count, length in zip(counts, lengths):
+            sentence_cells = _cells(cells[start:start + length], grid)
+            start += length
+            if ai.sentences == "bitset":
+                sentence = BitSentence(sentence_cells, count, width)
+            else:
+                sentence = Sentence(sentence_cells, count)
+            ai.knowledge.add(sentence)
+            for cell in sentence_cells:
+                ai.sentences_by_cell.setdefault(cell, set()).add(sentence)
+        return ai
+
+    raise ValueError(f"unknown checkpoint kind: {kind!r}")
+
+
+def save(obj, path):
+    with open(path, "wb") as file:
+        file.write(dumps(obj))
+
+
+def load(path, tracer=None, executor=None, rng=None, patterns=None):
+    with open(path, "rb") as file:
+        return loads(file.read(), tracer, executor, rng, patterns)
@@ -0,0 +1,271 @@
+import heapq
+from math import comb, log2
+from typing import Dict, List, Tuple
+
+import solver
+
+# Risks closer than this are the same risk; information breaks the tie
+RISK_TOLERANCE = 1e-9
+
+# Interior cells all share one risk: only this many are compared for information
+INTERIOR_SAMPLE = 32
+
+# Interior cells are drawn at random board positions while this many draws,
+# or fewer, are expected to find each one
+INTERIOR_DRAWS = 16
+
+# Components with more cells than this are not counted again for the number
+# a cell would show: their cells count as independent, each with its risk
+INFORMATION_MAX_CELLS = 24
+
+
+def _entropy_term(p):
+    # This outcome's share of an entropy, in bits
+    return -p * log2(p) if p > 0.0 else 0.0
+
+
+def _convolve(a: List[int], b: List[int]) -> List[int]:
+    # Ways of placing k mines over two independent parts, for every k (or
+    # the probability of k, over probabilities)
+    result = [0] * (len(a) + len(b) - 1)
+    for i, x in enumerate(a):
+        if x:
+            for j, y in enumerate(b):
+                result[i + j] += x * y
+    return result
+
+
+def _groups(sentences) -> List[frozenset]:
+    # Sentences split into groups sharing no cell, each a frozenset
+    by_cell: Dict[tuple, list] = {}
+    for sentence in sentences:
+        for cell in sentence:
+            by_cell.setdefault(cell, []).append(sentence)
+
+    groups = []
+    seen = set()
+    for start in sentences:
+        if start in seen or not len(start):
+            continue
+        seen.add(start)
+        group = [start]
+        for sentence in group:
+            for cell in sentence:
+                for other in by_cell[cell]:
+                    if other not in seen:
+                        seen.add(other)
+                        group.append(other)
+        groups.append(frozenset(group))
+    return groups
+
+
+class Guesser():
+    """Mine probabilities of the unknown cells, and the best cell to guess.
+
+    Each frontier component's placements are counted per number of mines
+    and combined with how many ways the remaining mines fit in the cells
+    next to no number, so every probability accounts for the mine total.
+    Counts are cached per component, keyed by its frozenset of sentences:
+    a component untouched since the last guess is not counted again.
+    """
+
+    def __init__(self):
+        # frozenset of sentences -> (component, solutions, mine_counts), or
+        # None for components too large to count
+        self.components = {}
+        # Frontier cell -> its counted solver.Component
+        self.component_of = {}
+
+    def __count(self, ai):
+        # Counted components, reusing the cached ones still in the knowledge
+        cached = {}
+        missing = []
+        for group in _groups(ai.knowledge):
+            if group in self.components:
+                cached[group] = self.components[group]
+            else:
+                missing.append((group, solver.frontier_components(group)[0]))
+
+        if ai.tracer.stats:
+            ai.tracer.count("guess_components_cached", len(cached))
+            ai.tracer.count("guess_components_counted", len(missing))
+
+        components = {id(component): group for group, component in missing}
+        for group, _ in missing:
+            cached[group] = None
+        counted = solver.map_components(solver.count_configurations,
+                                        [component for _, component in missing], ai.executor)
+        for component, result in counted:
+            if result is not None:
+                solutions, mine_counts = result
+                cached[components[id(component)]] = (component, solutions, mine_counts)
+
+        self.components = cached
+        counted = [result for result in cached.values() if result is not None]
+        self.component_of = {cell: component for component, _, _ in counted for cell in component.cells}
+        return counted
+
+    def probabilities(self, ai) -> Tuple[Dict[tuple, float], float]:
+        """Mine probability of each counted frontier cell, and of any other unknown cell.
+
+        Cells of components too large to count are treated like cells next
+        to no number. Without a known mine total, every placement of each
+        component weighs the same and other cells take the frontier's mean.
+        """
+        counted = [(component.cells, solutions, mine_counts)
+                   for component, solutions, mine_counts in self.__count(ai) if sum(solutions.values())]
+        frontier_cells = sum(len(cells) for cells, _, _ in counted)
+        interior = len(ai.unknowns) - frontier_cells
+
+        if ai.total_mines is not None:
+            weighted = self.__weighted(counted, interior, ai.total_mines - len(ai.mines))
+            if weighted is not None:
+                return weighted
+
+        frontier = {}
+        for cells, solutions, mine_counts in counted:
+            total = sum(solutions.values())
+            for i, cell in enumerate(cells):
+                frontier[cell] = sum(counts[i] for counts in mine_counts.values()) / total
+
+        if ai.total_mines is not None and interior:
+            left = ai.total_mines - len(ai.mines) - sum(frontier.values())
+            interior_risk = min(1.0, max(0.0, left / interior))
+        elif frontier:
+            interior_risk = sum(frontier.values()) / len(frontier)
+        else:
+            interior_risk = 0.5
+        return frontier, interior_risk
+
+    def __weighted(self, counted, interior, left):
+        # Placements with K frontier mines weigh comb(interior, left - K):
+        # the ways the other mines fit in the interior. None if no placement fits.
+        weights = {}
+
+        def weight(mines):
+            if mines not in weights:
+                rest = left - mines
+                weights[mines] = comb(interior, rest) if 0 <= rest <= interior else 0
+            return weights[mines]
+
+        distributions = []
+        for cells, solutions, _ in counted:
+            distribution = [0] * (max(solutions) + 1)
+            for mines, ways in solutions.items():
+                distribution[mines] = ways
+            distributions.append(distribution)
+
+        # Placements of all the components but one, from prefix and suffix products
+        prefix = [[1]]
+        for distribution in distributions:
+            prefix.append(_convolve(prefix[-1], distribution))
+        suffix = [[1]]
+        for distribution in reversed(distributions):
+            suffix.append(_convolve(suffix[-1], distribution))
+        suffix.reverse()
+
+        everything = prefix[-1]
+        total = sum(ways * weight(mines) for mines, ways in enumerate(everything))
+        if total == 0:
+            return None
+
+        frontier = {}
+        for index, (cells, solutions, mine_counts) in enumerate(counted):
+            others = _convolve(prefix[index], suffix[index + 1])
+            cell_weights = [0] * len(cells)
+            for mines, counts in mine_counts.items():
+                ways = sum(other * weight(mines + k) for k, other in enumerate(others))
+                for i, count in enumerate(counts):
+                    cell_weights[i] += count * ways
+            for cell, cell_weight in zip(cells, cell_weights):
+                frontier[cell] = cell_weight / total
+
+        interior_risk = 0.0
+        if interior:
+            expected = sum(ways * weight(mines) * (left - mines) for mines, ways in enumerate(everything))
+            interior_risk = expected / (total * interior)
+        return frontier, interior_risk
+
+    def information(self, ai, cell, frontier, interior_risk) -> float:
+        """Expected information, in bits, of the number a revealed `cell` would show.
+
+        That is the entropy of the number, given the cell is safe. The mines
+        it counts in each counted component follow from that component's
+        placements with `cell` safe, counted by the mines on the neighbours
+        only; other unknown neighbours (and those in components over
+        INFORMATION_MAX_CELLS) are mines with their own probability.
+        Components, and those neighbours, are taken as independent of each
+        other.
+        """
+        independent = []
+        around = {}
+        for neighbor in ai.get_neighboring(cell):
+            if neighbor not in ai.unknowns:
+                continue
+            component = self.component_of.get(neighbor)
+            if component is None or len(component) > INFORMATION_MAX_CELLS:
+                independent.append(neighbor)
+            else:
+                around.setdefault(id(component), (component, []))[1].append(neighbor)
+
+        distribution = [1.0]
+        for neighbor in independent:
+            risk = frontier.get(neighbor, interior_risk)
+            distribution = _convolve(distribution, [1.0 - risk, risk])
+
+        for component, neighbors in around.values():
+            index = {other: i for i, other in enumerate(component.cells)}
+            constraints = component.constraints
+            if cell in index:
+                constraints += (((index[cell],), 0),)
+            solutions = solver.count_solutions(solver.Component(component.cells, constraints),
+                                               counted={index[other] for other in neighbors})
+            total = sum(solutions.values()) if solutions is not None else 0
+            if total:
+                mines = [0.0] * (len(neighbors) + 1)
+                for k, ways in solutions.items():
+                    mines[k] = ways / total
+                distribution = _convolve(distribution, mines)
+
+        return sum(_entropy_term(p) for p in distribution)
+
+    def choose(self, ai, frontier, interior_risk):
+        """Least risky unknown cell, the most informative one among equally risky ones."""
+        interior_count = len(ai.unknowns) - len(frontier)
+        least_risk = min(frontier.values(), default=1.0)
+        if interior_count:
+            least_risk = min(least_risk, interior_risk)
+
+        # Sorted, so the pick does not depend on the knowledge set's order
+        candidates = sorted(cell for cell, risk in frontier.items() if risk - least_risk < RISK_TOLERANCE)
+        if interior_count and interior_risk - least_risk < RISK_TOLERANCE:
+            candidates.extend(self.__interior_sample(ai, frontier, interior_count))
+
+        if len(candidates) == 1:
+            return candidates[0]
+        scores = [self.information(ai, cell, frontier, interior_risk) for cell in candidates]
+        best = max(scores)
+        return ai.rng.choice([cell for cell, score in zip(candidates, scores) if best - score < 1e-9])
+
+    def __interior_sample(self, ai, frontier, interior_count):
+        # Up to INTERIOR_SAMPLE distinct unknown cells off the frontier, in
+        # cell order. The draw depends on the random state and on what is
+        # known, never on the unknown pool's slots (which follow the order
+        # of marks), so a restored AI draws the same cells
+        if interior_count <= INTERIOR_SAMPLE:
+            return sorted(cell for cell in ai.unknowns if cell not in frontier)
+
+        if interior_count * INTERIOR_DRAWS >= ai.height * ai.width:
+            # Draw board cells until enough are unknown and off the frontier
+            sample = set()
+            while len(sample) < INTERIOR_SAMPLE:
+                cell = (ai.rng.randrange(ai.height), ai.rng.randrange(ai.width))
+                if cell in ai.unknowns and cell not in frontier:
+                    sample.add(cell)
+            return sorted(sample)
+
+        # Too few left to find by drawing: keep the cells ranking lowest by a
+        # hash salted with one draw, and only sort those
+        salt = ai.rng.getrandbits(64)
+        interior = (cell for cell in ai.unknowns if cell not in frontier)
+        return sorted(heapq.nsmallest(INTERIOR_SAMPLE, interior, key=lambda cell: (hash((salt, cell)), cell)))
@@ -0,0 +1,93 @@
+from math import gcd
+from typing import Dict, List, Tuple
+
+from solver import Component
+
+
+def _normalize(row: Dict[int, int], value: int):
+    # Divide by the gcd of the coefficients and keep the first one positive
+    divisor = abs(value)
+    for coefficient in row.values():
+        divisor = gcd(divisor, coefficient)
+    if divisor > 1:
+        row = {column: coefficient // divisor for column, coefficient in row.items()}
+        value //= divisor
+    if row and row[min(row)] < 0:
+        row = {column: -coefficient for column, coefficient in row.items()}
+        value = -value
+    return row, value
+
+
+def _bounds(row: Dict[int, int], value: int, forced: Dict[int, int]) -> bool:
+    # Bound reasoning on sum(a * x) = value with x in {0, 1}: the smallest
+    # reachable sum takes every negative coefficient, the largest every
+    # positive one. Hitting either bound fixes all the row's variables.
+    low = sum(coefficient for coefficient in row.values() if coefficient < 0)
+    high = sum(coefficient for coefficient in row.values() if coefficient > 0)
+    if value == low:
+        for column, coefficient in row.items():
+            forced[column] = 1 if coefficient < 0 else 0
+        return True
+    if value == high:
+        for column, coefficient in row.items():
+            forced[column] = 1 if coefficient > 0 else 0
+        return True
+    return False
+
+
+def eliminate(component: Component) -> List[Tuple[Dict[int, int], int]]:
+    """Reduced row echelon form of the component's constraints.
+
+    Rows are sparse `{column: coefficient}` dicts over the component's cell
+    indices with an integer right-hand side. Elimination is fraction free:
+    rows are combined with integer multipliers and divided by their gcd.
+    """
+    rows = [_normalize({i: 1 for i in indices}, count) for indices, count in component.constraints]
+
+    pivot_rows = []
+    for column in range(len(component.cells)):
+        # Pivot on the sparsest row holding the column, to limit fill-in
+        candidates = [r for r in range(len(rows)) if column in rows[r][0]]
+        if not candidates:
+            continue
+        pivot = min(candidates, key=lambda r: len(rows[r][0]))
+
+        pivot_row, pivot_value = rows.pop(pivot)
+        a = pivot_row[column]
+
+        # Clear the column everywhere else, pivots found so far included
+        def reduce(row, value):
+            b = row[column]
+            combined = {}
+            for col in row.keys() | pivot_row.keys():
+                coefficient = a * row.get(col, 0) - b * pivot_row.get(col, 0)
+                if coefficient:
+                    combined[col] = coefficient
+            return _normalize(combined, a * value - b * pivot_value)
+
+        rows = [reduce(row, value) if column in row else (row, value) for row, value in rows]
+        pivot_rows = [reduce(row, value) if column in row else (row, value)
+                      for row, value in pivot_rows]
+        pivot_rows.append((pivot_row, pivot_value))
+
+    # Left over rows are all zero (0 = 0), or 0 = c for contradictory knowledge
+    return pivot_rows
+
+
+def forced_cells(component: Component) -> Tuple[List[tuple], List[tuple]]:
+    """Cells the constraints force to be safe or mines, as `(safes, mines)`.
+
+    Bound reasoning runs on the original rows and on every row of the
+    reduced echelon form, which chains deductions across overlapping
+    sentences that no pair of them gives on its own.
+    """
+    forced: Dict[int, int] = {}
+    for indices, count in component.constraints:
+        _bounds({i: 1 for i in indices}, count, forced)
+    for row, value in eliminate(component):
+        if row:
+            _bounds(row, value, forced)
+
+    safes = [component.cells[i] for i, value in forced.items() if value == 0]
+    mines = [component.cells[i] for i, value in forced.items() if value == 1]
+    return safes, mines
@@ -1,36 +1,42 @@
 import random
-from typing import List
+from collections import deque
+from typing import Dict, Set
+
+import guessing
+import linear_solver
+import solver
+import tracing
+from tracing import DEBUG, INFO, TRACE
 
 
 class Minesweeper():
     
-    def __init__(self, height=4, width=4, mines=4):
+    def __init__(self, height=4, width=4, mines=4, tracer=None, rng=None):
+        if not 0 <= mines <= height * width:
+            raise ValueError(f"cannot place {mines} mines on a {height}x{width} board")
+
+        self.tracer = tracer or tracing.DEFAULT
         self.height = height
         self.width = width
         self.mines = set()
 
-        self.board = []
-        for i in range(self.height):
-            row = []
-            for j in range(self.width):
-                row.append(False)
-            self.board.append(row)
+        self.board = [[False] * width for _ in range(height)]
 
-        while len(self.mines) != mines:
-            i = random.randrange(height)
-            j = random.randrange(width)
-            if not self.board[i][j]:
-                self.mines.add((i, j))
-                self.board[i][j] = True
+        # Sample mine positions without replacement: no retries, whatever the density
+        rng = rng or random
+        for index in rng.sample(range(height * width), mines):
+            i, j = divmod(index, width)
+            self.mines.add((i, j))
+            self.board[i][j] = True
 
-        print(self.mines)
+        self.tracer.log(DEBUG, "mines: %s", self.mines)
         self.mines_found = set()
 
     def print(self):  
         for i in range(self.height):
             print("--" * self.width + "-")
             for j in range(self.width):
-                if self.board[i][j]:
+                if self.is_mine((i, j)):
                     print("|X", end="")
                 else:
                     print("| ", end="")
@@ -56,270 +62,734 @@ class Minesweeper():
 
         return count
 
+    def reveal(self, cell, revealed=()):
+        """Reveal a safe cell, cascading through cells with no nearby mines.
+
+        Flood fills iteratively (no recursion limit on big boards) and skips
+        cells in `revealed`. Returns `{cell: nearby mines}` for every cell
+        uncovered, ready for `MinesweeperAI.add_knowledge_batch(result.items())`.
+        """
+        if self.is_mine(cell):
+            raise ValueError(f"{cell} is a mine")
+
+        result = {}
+        stack = [cell]
+        while stack:
+            current = stack.pop()
+            if current in result or current in revealed:
+                continue
+
+            count = self.nearby_mines(current)
+            result[current] = count
+            if count:
+                continue
+
+            # No mine around: every neighbour is safe, reveal them too
+            for i in range(current[0] - 1, current[0] + 2):
+                for j in range(current[1] - 1, current[1] + 2):
+                    if 0 <= i < self.height and 0 <= j < self.width and (i, j) not in result:
+                        stack.append((i, j))
+
+        return result
+
     def won(sel):  
         return self.mines_found == self.mines
 
 
 class Sentence():
+    """`count` of `cells` are mines.
 
-    def __init__(self, cells, count):
-        self.cells = set(cells)
-        self.count = count
+    Sentences are immutable and hashable, so the knowledge base can keep them
+    in sets; marking a cell returns a new, reduced sentence.
+    """
 
-        self.safes = set()
-        self.mines = set()
+    __slots__ = ("cells", "count", "hash")
 
+    def __init__(self, cells, count):
+        self.cells = frozenset(cells)
+        self.count = count
+        self.hash = hash((self.cells, count))
 
     def __eq__(self, other):
         return self.cells == other.cells and self.count == other.count
 
+    def __hash__(self):
+        return self.hash
+
     def __str__(self):
-        return f"{self.cells} = {self.count}"
+        return f"{set(self.cells)} = {self.count}"
 
     def known_mines(self):
         # If all cells in the sentence are mines, return them
         if len(self.cells) == self.count:
-            return self.cells.copy()
+            return set(self.cells)
         # Otherwise, no definitive conclusion
         return set()
   
     def known_safes(self):
         if self.count == 0:
-            return self.cells.copy()
-        return self.safes        
+            return set(self.cells)
+        return set()
         
     def mark_mine(self, cell):
         if self.cells.__contains__(cell):
-            self.mines.add(cell)
-            self.cells.remove(cell)
-            self.count = self.count - 1
+            return Sentence(self.cells.difference((cell,)), self.count - 1)
+        return self
 
     def mark_safe(self, cell):    
         if self.cells.__contains__(cell):
-            self.safes.add(cell)
-            self.cells.remove(cell)
+            return Sentence(self.cells.difference((cell,)), self.count)
+        return self
+
+    # Operations the inference engine relies on (shared with BitSentence)
+
+    def __len__(self):
+        return len(self.cells)
+
+    def __iter__(self):
+        return iter(self.cells)
+
+    def issubset(self, other):
+        return self.cells.issubset(other.cells)
+
+    def overlap(self, other):
+        return len(self.cells.intersection(other.cells))
+
+    def difference(self, other, count):
+        return Sentence(self.cells.difference(other.cells), count)
+
+
+class BitSentence():
+    """Sentence storing its cells as a bitmask over the flat index i * width + j.
+
+    Subset, difference and intersection checks are single integer operations.
+    Immutable and hashable like `Sentence`.
+    """
+
+    __slots__ = ("mask", "count", "width", "hash")
+
+    def __init__(self, cells, count, width):
+        mask = 0
+        for i, j in cells:
+            mask |= 1 << (i * width + j)
+        self.mask = mask
+        self.count = count
+        self.width = width
+        self.hash = hash((mask, count))
+
+    @classmethod
+    def from_mask(cls, mask, count, width):
+        sentence = cls.__new__(cls)
+        sentence.mask = mask
+        sentence.count = count
+        sentence.width = width
+        sentence.hash = hash((mask, count))
+        return sentence
+
+    @property
+    def cells(self):
+        return set(self)
+
+    def __eq__(self, other):
+        return self.mask == other.mask and self.count == other.count
+
+    def __hash__(self):
+        return self.hash
+
+    def __str__(self):
+        return f"{self.cells} = {self.count}"
+
+    def known_mines(self):
+        if len(self) == self.count:
+            return self.cells
+        return set()
+
+    def known_safes(self):
+        if self.count == 0:
+            return self.cells
+        return set()
+
+    def mark_mine(self, cell):
+        bit = 1 << (cell[0] * self.width + cell[1])
+        if self.mask & bit:
+            return BitSentence.from_mask(self.mask ^ bit, self.count - 1, self.width)
+        return self
+
+    def mark_safe(self, cell):
+        bit = 1 << (cell[0] * self.width + cell[1])
+        if self.mask & bit:
+            return BitSentence.from_mask(self.mask ^ bit, self.count, self.width)
+        return self
+
+    def __len__(self):
+        return self.mask.bit_count()
+
+    def __iter__(self):
+        mask = self.mask
+        while mask:
+            low = mask & -mask
+            yield divmod(low.bit_length() - 1, self.width)
+            mask ^= low
+
+    def issubset(self, other):
+        return self.mask & ~other.mask == 0
+
+    def overlap(self, other):
+        return (self.mask & other.mask).bit_count()
+
+    def difference(self, other, count):
+        return BitSentence.from_mask(self.mask & ~other.mask, count, self.width)
+
+
+# Hops (through shared cells) around changed sentences that the matrix backend
+# eliminates over; whole components on big boards make every move cubic
+ELIMINATION_DEPTH = 2
+
+class CellPool():
+    """Set of cells with O(1) add and discard, iterated in the order added.
+
+    Cells are the keys of a dict, which keeps their order: a checkpoint
+    saves them in that order and a restored pool iterates alike.
+    """
+
+    def __init__(self, cells=()):
+        self.cells = dict.fromkeys(cells)
+
+    def __len__(self):
+        return len(self.cells)
+
+    def __contains__(self, cell):
+        return cell in self.cells
+
+    def __iter__(self):
+        return iter(self.cells)
+
+    def add(self, cell):
+        self.cells[cell] = None
+
+    def discard(self, cell):
+        self.cells.pop(cell, None)
 
 
 class MinesweeperAI():
 
-    def __init__(self, height=8, width=8):
+    def __init__(self, height=8, width=8, sentences="set", tracer=None, mines=None,
+                 backend="pairwise", executor=None, rng=None, patterns=None, unknowns=None):
+
+        if sentences not in ("set", "bitset"):
+            raise ValueError(f"unknown sentence representation: {sentences!r}")
+        if backend not in ("pairwise", "matrix"):
+            raise ValueError(f"unknown inference backend: {backend!r}")
 
         self.height = height
         self.width = width
+        self.sentences = sentences
+        # Inference: pairwise subset/intersection rules, or those rules
+        # followed by Gaussian elimination over the constraint matrix of the
+        # frontier components they touched
+        self.backend = backend
+        # Total number of mines on the board, when known; weighs random guesses
+        self.total_mines = mines
+        # Optional concurrent.futures executor (e.g. a ProcessPoolExecutor)
+        # that solves large frontier components in parallel
+        self.executor = executor
+        # Optional patterns.PatternCache: before inference, the forced cells
+        # of small components around new cells are marked by shape (from the
+        # cache when seen before). The pairwise rules still run over them, so
+        # the cache only adds deductions, at some cost in time
+        self.patterns = patterns
+        # Guess selection, with its per-component counts cached between moves
+        self.guesser = guessing.Guesser()
+        # Source of random guesses: a seeded random.Random makes play reproducible
+        self.rng = rng or random
+        self.tracer = tracer or tracing.DEFAULT
         self.moves_made = set()
         self.mines = set()
         self.safes = set()
-        self.knowledge: List[Sentence] = []
+        # Only sentences with unknown cells are kept: resolved ones are dropped,
+        # and a sentence containing another is replaced by their difference
+        self.knowledge: Set[Sentence] = set()
+
+        # Inverted index: cell -> sentences whose cells contain it
+        self.sentences_by_cell: Dict[tuple, Set[Sentence]] = {}
+
+        # Inference worklist: sentences added since they were last compared
+        # with their neighbours (and the same as a set, to avoid queuing twice)
+        self.pending = deque()
+        self.queued: Set[Sentence] = set()
+
+        # Move selection: safe cells not played yet (in the order they were
+        # found), and cells neither played nor known to be safe or a mine
+        # (every cell, unless `unknowns` lists them, e.g. from a checkpoint)
+        self.safe_queue = deque()
+        if unknowns is None:
+            unknowns = ((i, j) for i in range(height) for j in range(width))
+        self.unknowns = CellPool(unknowns)
 
     def __str__(self):
         return f"mines: {str(self.mines)}"
 
     def mark_mine(self, cell):  
         self.mines.add(cell)
-        for sentence in self.knowledge:
-            sentence.mark_mine(cell)
+        self.unknowns.discard(cell)
+        # Once marked the cell leaves every sentence, so its bucket is done
+        for sentence in self.sentences_by_cell.pop(cell, ()):
+            self.__replace(sentence, sentence.mark_mine(cell))
 
     def mark_safe(self, cell):  
-        self.safes.add(cell)
-        for sentence in self.knowledge:
-            sentence.mark_safe(cell)
+        if not self.safes.__contains__(cell):
+            self.safes.add(cell)
+            self.unknowns.discard(cell)
+            if not self.moves_made.__contains__(cell):
+                self.safe_queue.append(cell)
+        for sentence in self.sentences_by_cell.pop(cell, ()):
+            self.__replace(sentence, sentence.mark_safe(cell))
+
+    def __new_sentence(self, cells, count):
+        if self.sentences == "bitset":
+            return BitSentence(cells, count, self.width)
+        return Sentence(cells, count)
+
+    def __add_sentence(self, sentence: Sentence):
+        if self.tracer.stats:
+            self.tracer.count("sentences_created")
+        self.knowledge.add(sentence)
+        for cell in sentence:
+            self.sentences_by_cell.setdefault(cell, set()).add(sentence)
+
+    def __remove_sentence(self, sentence: Sentence):
+        self.knowledge.discard(sentence)
+        for cell in sentence:
+            bucket = self.sentences_by_cell.get(cell)
+            if bucket is None:
+                continue
+            bucket.discard(sentence)
+            if not bucket:
+                del self.sentences_by_cell[cell]
+
+    def __replace(self, sentence: Sentence, reduced: Sentence):
+        # The reduced sentence is dropped if empty or already known
+        self.__remove_sentence(sentence)
+        self.__try_save(reduced)
+
+    def __is_live(self, sentence: Sentence) -> bool:
+        return self.knowledge.__contains__(sentence)
+
+    def __resolves(self, sentence: Sentence) -> bool:
+        unknowns = len(sentence)
+        return unknowns > 0 and (sentence.count == 0 or sentence.count == unknowns)
+
+    def __enqueue(self, sentence: Sentence):
+        if self.queued.__contains__(sentence):
+            return
+        self.queued.add(sentence)
+
+        # Sentences that already resolve jump the queue: marking is cheap and
+        # shrinks every sentence compared afterwards
+        if self.__resolves(sentence):
+            self.pending.appendleft(sentence)
+        else:
+            self.pending.append(sentence)
 
     def add_knowledge(self, cell, count):                                                                                                                                             
+        self.add_knowledge_batch(((cell, count),))
+
+    def add_knowledge_batch(self, observations):
+        """Record many revealed `(cell, count)` pairs, then infer once.
+
+        Every cell is marked safe before any sentence is built, so sentences
+        come out already reduced, and inference runs to its fixpoint a single
+        time instead of once per cell (e.g. for an opening cascade or a replay).
+
+        The pairwise rules depend on the order sentences arrive in, so a batch
+        could miss deductions the same cells added one by one would find; a
+        batch therefore finishes with an exact pass over the frontier
+        components of three or more sentences it touched, which proves at
+        least as much in every component of up to solver.MAX_COMPONENT_CELLS
+        cells. `benchmark.py` times it against one call per cell.
+        """
         
-        print("---------------------------------------------------------------------------------------")
+        tracer = self.tracer
+        observations = list(observations)
 
-        print(f"{cell} - {count}\n")  
+        with tracer.phase("add_knowledge"):
     
-        self.moves_made.add(cell)         
-        self.mark_safe(cell)
+            for cell, count in observations:
+                tracer.log(INFO, "add_knowledge: %s - %s", cell, count)
+                self.moves_made.add(cell)         
+                self.mark_safe(cell)
+
+            queued = len(self.safe_queue)
 
-        self.__use_inference()
+            # Neighbours of the new cells: where new sentences can settle anything
+            touched = set()
+            for cell, count in observations:
+                touched.update(self.__observe(cell, count))
+
+            with tracer.phase("inference"):
+                if self.patterns is not None:
+                    self.__solve_patterns(touched)
+
+                self.__create_new_knowledge() 
+
+                if len(observations) > 1:
+                    # Once a component gives something, only the components
+                    # around it have anything new to solve
+                    while touched:
+                        touched = self.__solve_frontier(touched)
+                        if touched:
+                            self.__create_new_knowledge()
+
+            self.__sort_safes(queued)
+         
+        if tracer.level >= TRACE:
+            tracer.log(TRACE, "Knowledge AFTER __create_new_knowledge and __use_inference:")
+            for sentence in self.knowledge:
+                tracer.log(TRACE, "sentence: %s", sentence)
+
+    def __sort_safes(self, queued):
+        # Cells found safe together are played in cell order rather than in
+        # whatever order the knowledge set yielded them, so play only depends
+        # on what is known (e.g. after restoring a checkpoint)
+        found = len(self.safe_queue) - queued
+        if found > 1:
+            cells = sorted(self.safe_queue.pop() for _ in range(found))
+            self.safe_queue.extend(cells)
+
+    def sentences_around(self, cells, depth=None) -> Set[Sentence]:
+        """Live sentences of every frontier component containing one of `cells`.
+
+        With `depth`, stop after that many hops (through shared cells) away
+        from the sentences holding `cells` instead of taking whole components.
+        """
+        found = set()
+        level = [cell for cell in cells if cell in self.sentences_by_cell]
+        visited = set(level)
+        hops = 0
+        while level and (depth is None or hops <= depth):
+            next_level = []
+            for cell in level:
+                for sentence in self.sentences_by_cell.get(cell, ()):
+                    if sentence in found:
+                        continue
+                    found.add(sentence)
+                    for other in sentence:
+                        if other not in visited:
+                            visited.add(other)
+                            next_level.append(other)
+            level = next_level
+            hops += 1
+        return found
+
+    def __small_components(self, cells, max_cells):
+        # Sentences of every component holding one of `cells` and at most
+        # `max_cells` cells; the walk over a component stops once it is larger
+        seen = set()
+        for start in cells:
+            if start in seen or start not in self.sentences_by_cell:
+                continue
+            found = set()
+            walked = [start]
+            component_cells = {start}
+            for cell in walked:
+                for sentence in self.sentences_by_cell.get(cell, ()):
+                    if sentence in found:
+                        continue
+                    found.add(sentence)
+                    for other in sentence:
+                        if other not in component_cells:
+                            component_cells.add(other)
+                            walked.append(other)
+                if len(component_cells) > max_cells:
+                    break
+            seen.update(component_cells)
+            if len(component_cells) <= max_cells:
+                yield found
+
+    def __solve_frontier(self, cells) -> Set[tuple]:
+        # Mark every cell the exact solver proves safe or a mine, in the
+        # components around `cells`; returns the cells of the components that
+        # had any. The pairwise rules are exact over one or two sentences, so
+        # only components of three or more are searched
+        components = [component for component in solver.frontier_components(self.sentences_around(cells))
+                      if len(component.constraints) >= 3]
+        solved = set()
+        for component, result in solver.map_components(solver.forced_cells, components, self.executor):
+            if result is None or not (result[0] or result[1]):
+                continue
+            solved.update(component.cells)
+            for i in result[0]:
+                self.mark_safe(component.cells[i])
+            for i in result[1]:
+                self.mark_mine(component.cells[i])
+        return solved
+
+    def __solve_patterns(self, cells):
+        # Before any pairwise work, mark what the pattern cache knows about
+        # the small components around `cells`. Their sentences stay queued:
+        # the pairwise rules still compare them, only over fewer cells, so the
+        # sentences they derive (and later deductions) are not lost
+        patterns = self.patterns
+
+        # Resolved sentences jump the worklist: marking them first leaves
+        # fewer, smaller shapes to look up
+        pending = self.pending
+        while pending and self.__resolves(pending[0]):
+            sentence = pending.popleft()
+            self.queued.discard(sentence)
+            if self.__is_live(sentence):
+                self.__use_inference(sentence)
+
+        for sentences in self.__small_components(cells, patterns.max_cells):
+            # One or two sentences take the pairwise rules a single
+            # comparison, which costs less than looking the shape up
+            if len(sentences) < 3:
+                continue
+            hits = patterns.hits
+            safes, mines = patterns.forced_sentences(sentences)
+            if self.tracer.stats:
+                self.tracer.count("pattern_hits" if patterns.hits > hits else "pattern_misses")
+            for cell in safes:
+                self.mark_safe(cell)
+            for cell in mines:
+                self.mark_mine(cell)
+
+    def __observe(self, cell, count):
+        # Add the sentence a revealed count gives about its still unknown
+        # neighbours; returns the neighbours
 
         neighboring = self.get_neighboring(cell)
 
         unknowns = set()
-        safes = set()
         mines = set()
         for cell in neighboring:
             if self.safes.__contains__(cell):
-                safes.add(cell)
+                continue
             elif self.mines.__contains__(cell):
                 mines.add(cell)
             else:
                 unknowns.add(cell) 
                                                           
-        acquired_sentence = Sentence(unknowns, count - len(mines))
-        acquired_sentence.safes = safes
-        acquired_sentence.mines = mines
+        acquired_sentence = self.__new_sentence(unknowns, count - len(mines))
   
-        self.knowledge.append(acquired_sentence)
+        if self.__resolves(acquired_sentence):
+            # Nothing to compare: its cells are marked right away
+            self.__mark_all(acquired_sentence, acquired_sentence.count > 0)
+        else:
+            self.__try_save(acquired_sentence)
         
-        print(f"Complete Sentence: {Sentence(neighboring, count)}")
-        print(f"Reduced Sentence [acquired_sentence]: {acquired_sentence}")
- 
-        print(f"[DEBUG] Knowledge BEFORE __create_new_knowledge and __use_inference:")
-        print("--------------------------------------------------------------------------------------")
-        for sentence in self.knowledge:
-            print(f"sentence: {sentence}")
-        print("--------------------------------------------------------------------------------------")
-
-        self.__create_new_knowledge() 
-         
-        print(f"[DEBUG] Knowledge AFTER __create_new_knowledge and __use_inference:")
-        print("--------------------------------------------------------------------------------------")
-        for sentence in self.knowledge:
-            print(f"sentence: {sentence}")
-
-        print("--------------------------------------------------------------------------------------")  
-        for sentence in self.knowledge:
-            print(f"sentence.known_mines: {sentence.known_mines()}")
-            print(f"sentence.known_safes: {sentence.known_safes()}")
- 
-
-    def __use_inference(self):
+        if self.tracer.level >= DEBUG:
+            self.tracer.log(DEBUG, "Complete Sentence: %s", Sentence(neighboring, count))
+            self.tracer.log(DEBUG, "Reduced Sentence [acquired_sentence]: %s", acquired_sentence)
+
+        return neighboring
+
+    def __use_inference(self, sentence: Sentence) -> bool:
         
-        count = 0
-        while count < len(self.knowledge):
-
-            sentence = self.knowledge.__getitem__(count)
-
-            print(f"Sentence [Make Deduction]: {sentence}")
-
-            unknowns = len(sentence.cells) 
-            mines = sentence.count 
-            all_safes = unknowns > 0 and mines == 0 
-            all_mines = mines > 0 and mines == unknowns
-            propagate = all_safes or all_mines
-                                              
-            if propagate:
-                count = 0
-                sentence_cells_cp = sentence.cells.copy()
-                if all_safes:  
-                    for cell in sentence_cells_cp:
-                        self.mark_safe(cell)
-                elif all_mines:
-                    for cell in sentence_cells_cp:
-                        self.mark_mine(cell)
-            else:
-                count += 1
+        unknowns = len(sentence) 
+        mines = sentence.count 
+        all_safes = unknowns > 0 and mines == 0 
+        all_mines = mines > 0 and mines == unknowns
+        propagate = all_safes or all_mines
+                                          
+        if propagate:
+            if self.tracer.level >= DEBUG:
+                self.tracer.log(DEBUG, "Sentence [Make Deduction]: %s", sentence)
+            # Marking enqueues every other sentence sharing these cells
+            self.__mark_all(sentence, all_mines)
+
+        return propagate
+
+
+    def __mark_all(self, sentence: Sentence, mines: bool):
+        # Mark every cell of a resolved sentence: each sentence sharing cells
+        # with it is reduced once, by their difference, rather than once per cell
+        affected = set()
+        for cell in sentence:
+            if mines:
+                self.mines.add(cell)
+                self.unknowns.discard(cell)
+            elif not self.safes.__contains__(cell):
+                self.safes.add(cell)
+                self.unknowns.discard(cell)
+                if not self.moves_made.__contains__(cell):
+                    self.safe_queue.append(cell)
+            affected.update(self.sentences_by_cell.pop(cell, ()))
+
+        for other in affected:
+            count = other.count - other.overlap(sentence) if mines else other.count
+            self.__replace(other, other.difference(sentence, count))
 
 
     def __try_save(self, sentence: Sentence) -> bool:
         
-        if not self.knowledge.__contains__(sentence) and len(sentence.cells) > 0:
-            self.knowledge.append(sentence)
-            return True
-        
-        return False
-        
+        if len(sentence) == 0 or self.knowledge.__contains__(sentence):
+            return False
+
+        self.__add_sentence(sentence)
+        self.__enqueue(sentence)
+        return True
+
 
     def __create_new_knowledge(self): 
         
-        self.__use_inference()       
-        for sentence_x in self.knowledge: 
-            
-            # Avoid to compare new sentences to completely revealed sets
-            if len(sentence_x.cells) == 0:                                                                      
+        if self.backend == "matrix":
+            self.__eliminate()
+            return
+
+        self.__propagate()
+
+
+    def __propagate(self, touched=None):
+        # Worklist: only new or changed sentences are queued, and each one is
+        # only compared with the sentences sharing at least one cell with it;
+        # the cells of every sentence compared are added to `touched`
+        while self.pending:
+
+            sentence_x = self.pending.popleft()
+            self.queued.discard(sentence_x)
+            if self.tracer.stats:
+                self.tracer.count("inference_iterations")
+
+            if not self.__is_live(sentence_x) or self.__use_inference(sentence_x):
                 continue
-            
-            for sentence_y in self.knowledge:
-                
-                kb_updated = False 
 
-                # Avoid to compare new sentences to completely revealed sets
-                if len(sentence_y.cells) == 0 or sentence_y.__eq__(sentence_x):                                                                      
+            neighbors = set()
+            for cell in sentence_x:
+                neighbors.update(self.sentences_by_cell.get(cell, ()))
+            neighbors.discard(sentence_x)
+            if touched is not None:
+                touched.update(sentence_x)
+
+            for sentence_y in neighbors:
+                if not self.__is_live(sentence_y):
                     continue
- 
-                print("\n")
-                print(f"sentence_x: {sentence_x}\n")
-                print(f"sentence_y: {sentence_y}\n")                                                 
-                print("\n\n")
-
-                if sentence_y.cells.issubset(sentence_x.cells):
-                    
-                    new_sentence = Sentence(sentence_x.cells.difference(sentence_y.cells), max(0, sentence_x.count - sentence_y.count))
-                    print(f"new_sentence [Subset]: {new_sentence}")
-                    kb_updated = self.__try_save(new_sentence)
-                    if kb_updated:
-                        self.knowledge.remove(sentence_x)
-                      
-                elif sentence_x.cells.issubset(sentence_y.cells):
-
-                    new_sentence = Sentence(sentence_y.cells.difference(sentence_x.cells), max(0, sentence_y.count - sentence_x.count))
-                    print(f"new_sentence [Subset]: {new_sentence}")
-                    
-                    kb_updated = self.__try_save(new_sentence)
-                    if kb_updated:
-                        self.knowledge.remove(sentence_y)  
-                else:
+                if self.__combine(sentence_x, sentence_y):
+                    # sentence_x was replaced, its replacement is queued
+                    break
 
-                    intersection = sentence_x.cells.intersection(sentence_y.cells)
-                    if len(intersection) and not sentence_x.__eq__(sentence_y):
- 
-                        # Represent the number of safe cells: cannot be Negative
-                        #safe_cells_x = min(len(sentence_x.cells) - sentence_x.count, len(intersection))
-                        no_mines_x = len(sentence_x.cells) - sentence_x.count
-                        
-                        # The minimum number of mines in the intersecion (concluded by looking at the set A)
-                        # Safe cells are retrieved by subtracting the count value from the length of the set. 
-                        min_mines_intersection_x = len(intersection) - no_mines_x # Observation: A negative number means a minimum
-                        # of safes elements in Intersection
-
-                        max_mines_intersection_x = min(sentence_x.count, len(intersection))
-                        
-                        no_mines_y = len(sentence_y.cells) - sentence_y.count
-
-                        # The minimum number of mines in the intersecion concluded by looking at the set B
-                        min_mines_intersection_y = len(intersection) - no_mines_y # A negative number means Safes (in Intersection)
-
-                        # The max number of mines is the count value when count is smaller then the size of the Intersection 
-                        # Ex. A set with a count of 3 and a Intersection with a length of 2 couldn't have a max number of mines of 3
-                        # (more mines of elements in the Intersection Set)
-                        max_mines_intersection_y = min(sentence_y.count, len(intersection))
- 
-                        new_count = None 
-                        if max_mines_intersection_x == min_mines_intersection_y:
-                            new_count = max_mines_intersection_x
-                        if max_mines_intersection_y == min_mines_intersection_x:
-                            new_count = max_mines_intersection_y
-            
-                        if new_count is not None:
-                            new_sentence = Sentence(intersection, new_count)       
-                            print(f"new_sentence [Intersection]: {new_sentence}")
-                              
-                            virtual_sentence_x = Sentence(
-                                    sentence_x.cells.difference(new_sentence.cells), 
-                                    max(0, sentence_x.count - new_sentence.count))
-                            print(f"virtual_sentence_x: {virtual_sentence_x}")
-                            
-                            virtual_sentence_y = Sentence(
-                                    sentence_y.cells.difference(new_sentence.cells), 
-                                    max(0, sentence_y.count - new_sentence.count))
-                            print(f"virtual_sentence_x: {virtual_sentence_y}")
- 
-                            kb_updated = self.__try_save(virtual_sentence_x)
-                            kb_updated = self.__try_save(virtual_sentence_y) or kb_updated
+
+    def __eliminate(self):
+        # Matrix backend: the pairwise rules run to their fixpoint first, then
+        # elimination over the sentences near the ones they compared finds
+        # what takes more than two sentences; marks queue the reduced
+        # sentences, so deductions keep spreading until none is left
+        while self.pending:
+
+            touched = set()
+            self.__propagate(touched)
+
+            around = self.sentences_around(touched, ELIMINATION_DEPTH)
+            for component in solver.frontier_components(around):
+                if self.tracer.stats:
+                    self.tracer.count("components_eliminated")
+                safes, mines = linear_solver.forced_cells(component)
+                for cell in safes:
+                    self.mark_safe(cell)
+                for cell in mines:
+                    self.mark_mine(cell)
+
+
+    def __combine(self, sentence_x: Sentence, sentence_y: Sentence) -> bool:
+        """Apply the subset and intersection rules to an overlapping pair.
+
+        Returns True when `sentence_x` was removed from the knowledge base.
+        """
+
+        tracer = self.tracer
+        if tracer.stats:
+            tracer.count("pairs_compared")
+        if tracer.level >= TRACE:
+            tracer.log(TRACE, "compare: %s | %s", sentence_x, sentence_y)
+
+        y_in_x = sentence_y.issubset(sentence_x)
+        x_in_y = sentence_x.issubset(sentence_y)
+
+        if y_in_x and x_in_y:
+            # Same cells, different counts (equal sentences are deduplicated):
+            # contradictory knowledge, nothing sound to derive
+            return False
+
+        if y_in_x:
             
-                if kb_updated:                           
-                    self.__use_inference()
+            new_sentence = sentence_x.difference(sentence_y, max(0, sentence_x.count - sentence_y.count))
+            if tracer.level >= DEBUG:
+                tracer.log(DEBUG, "new_sentence [Subset]: %s", new_sentence)
+            # sentence_x is now implied by sentence_y and new_sentence
+            self.__remove_sentence(sentence_x)
+            self.__try_save(new_sentence)
+            return True
+              
+        if x_in_y:
+
+            new_sentence = sentence_y.difference(sentence_x, max(0, sentence_y.count - sentence_x.count))
+            if tracer.level >= DEBUG:
+                tracer.log(DEBUG, "new_sentence [Subset]: %s", new_sentence)
+            self.__remove_sentence(sentence_y)
+            self.__try_save(new_sentence)
+            return False
+
+        intersection = sentence_x.overlap(sentence_y)
+
+        # Represent the number of safe cells: cannot be Negative
+        #safe_cells_x = min(len(sentence_x.cells) - sentence_x.count, intersection)
+        no_mines_x = len(sentence_x) - sentence_x.count
+        
+        # The minimum number of mines in the intersecion (concluded by looking at the set A)
+        # Safe cells are retrieved by subtracting the count value from the length of the set. 
+        min_mines_intersection_x = intersection - no_mines_x # Observation: A negative number means a minimum
+        # of safes elements in Intersection
+
+        max_mines_intersection_x = min(sentence_x.count, intersection)
+        
+        no_mines_y = len(sentence_y) - sentence_y.count
+
+        # The minimum number of mines in the intersecion concluded by looking at the set B
+        min_mines_intersection_y = intersection - no_mines_y # A negative number means Safes (in Intersection)
+
+        # The max number of mines is the count value when count is smaller then the size of the Intersection 
+        # Ex. A set with a count of 3 and a Intersection with a length of 2 couldn't have a max number of mines of 3
+        # (more mines of elements in the Intersection Set)
+        max_mines_intersection_y = min(sentence_y.count, intersection)
+
+        new_count = None 
+        if max_mines_intersection_x == min_mines_intersection_y:
+            new_count = max_mines_intersection_x
+        if max_mines_intersection_y == min_mines_intersection_x:
+            new_count = max_mines_intersection_y
+
+        if new_count is not None:
+            # Removing the intersection from either sentence leaves its difference
+            virtual_sentence_x = sentence_x.difference(
+                    sentence_y, max(0, sentence_x.count - new_count))
+            virtual_sentence_y = sentence_y.difference(
+                    sentence_x, max(0, sentence_y.count - new_count))
+
+            if tracer.level >= DEBUG:
+                tracer.log(DEBUG, "new_sentence [Intersection]: %s shared cells = %s", intersection, new_count)
+                tracer.log(DEBUG, "virtual_sentence_x: %s", virtual_sentence_x)
+                tracer.log(DEBUG, "virtual_sentence_y: %s", virtual_sentence_y)
+
+            self.__try_save(virtual_sentence_x)
+            self.__try_save(virtual_sentence_y)
+
+        return False
                              
             
     # Apply Matrix Operation
     def get_neighboring(self, cell: tuple):
-        neighboring = set()
-        for i in range(cell[0] - 1, cell[0] + 2):
-            for j in range(cell[1] - 1, cell[1] + 2):                                                         
-                if (i, j) == cell:
-                    continue
-                                                                 
-                if 0 <= i < self.height and 0 <= j < self.width:
-                    neighboor = (i, j)
-                    neighboring.add(neighboor)  
-
+        # The 3x3 box around the cell, clipped to the board, without the cell
+        i, j = cell
+        rows = range(max(i - 1, 0), min(i + 2, self.height))
+        columns = range(max(j - 1, 0), min(j + 2, self.width))
+        neighboring = {(row, column) for row in rows for column in columns}
+        neighboring.discard(cell)
         return neighboring
 
     def make_safe_move(self):
-        for safe in self.safes:
+        while self.safe_queue:
+            safe = self.safe_queue.popleft()
+            # Cells can be played before they are deduced safe (random moves)
             if self.moves_made.__contains__(safe):
                 continue
             self.moves_made.add(safe)
@@ -329,18 +799,34 @@ class MinesweeperAI():
         return None
 
     def make_random_move(self):  
-        choices = []
-        for i in range(self.height):
-            for j in range(self.width):
-                move_candidate = (i, j)
-                if self.moves_made.__contains__(move_candidate) or self.mines.__contains__(move_candidate):
-                    continue
-
-                choices.append(move_candidate)
-        
-        random_choice = random.choice(choices)
-
-        print(random_choice)
+        frontier, interior_risk = self.guesser.probabilities(self)
+
+        # Cells certain in every placement are deductions, not guesses: mark
+        # them, and play a safe one if the solver found any
+        forced = sorted(cell for cell, risk in frontier.items() if risk == 0.0 or risk == 1.0)
+        if forced:
+            queued = len(self.safe_queue)
+            for cell in forced:
+                if frontier.pop(cell) == 0.0:
+                    self.mark_safe(cell)
+                else:
+                    self.mark_mine(cell)
+            self.__create_new_knowledge()
+            self.__sort_safes(queued)
+            safe = self.make_safe_move()
+            if safe is not None:
+                return safe
+            frontier = {cell: risk for cell, risk in frontier.items() if cell in self.unknowns}
+
+        if not self.unknowns:
+            return None
+
+        # Lowest mine probability first, then the most informative number
+        random_choice = self.guesser.choose(self, frontier, interior_risk)
+
+        if self.tracer.level >= INFO:
+            risk = frontier.get(random_choice, interior_risk)
+            self.tracer.log(INFO, "random move: %s (mine probability %.3f)", random_choice, risk)
 
         return random_choice
 
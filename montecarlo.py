@@ -0,0 +1,305 @@
+import argparse
+import time
+
+import numpy as np
+
+from boards import NEIGHBOR_OFFSETS, _check_mines, neighbor_counts
+
+
+def box_max(values: np.ndarray) -> np.ndarray:
+    """Largest value in the 3x3 box around every cell, over the last two axes."""
+    rows = values.copy()
+    np.maximum(rows[..., :, 1:], values[..., :, :-1], out=rows[..., :, 1:])
+    np.maximum(rows[..., :, :-1], values[..., :, 1:], out=rows[..., :, :-1])
+    box = rows.copy()
+    np.maximum(box[..., 1:, :], rows[..., :-1, :], out=box[..., 1:, :])
+    np.maximum(box[..., :-1, :], rows[..., 1:, :], out=box[..., :-1, :])
+    return box
+
+
+def random_guess(batch, games, rng) -> np.ndarray:
+    """Uniform guess among the unknown cells of the boards `games`."""
+    keys = rng.random((len(games), batch.height, batch.width))
+    keys[batch.revealed[games] | batch.flags[games]] = 2.0
+    return keys.reshape(len(games), -1).argmin(axis=1)
+
+
+def local_guess(batch, games, rng) -> np.ndarray:
+    """Guess the unknown cell with the lowest local mine estimate on the boards `games`.
+
+    A cell next to revealed numbers is given the largest share of the
+    missing mines among the unknown cells around any of them. Other cells
+    share the mines not flagged yet. Ties are broken at random.
+    """
+    revealed = batch.revealed[games]
+    unknown = ~revealed & ~batch.flags[games]
+    around = batch.unknown_around[games]
+    flags_around = batch.flags_around[games]
+    missing = batch.counts[games].astype(np.float32) - flags_around
+    share = np.where(revealed & (around > 0), missing / np.maximum(around, 1), 0.0)
+    # Unknown cells have no share of their own, so the box max is the neighbours'
+    local = box_max(share.astype(np.float32))
+
+    flagged = batch.flag_count[games]
+    interior = (batch.mines - flagged) / np.maximum(batch.cells - batch.revealed_count[games] - flagged, 1)
+    # Next to a revealed number: some neighbour is neither unknown nor flagged
+    frontier = batch.inside > around + flags_around
+    risk = np.where(frontier, local, interior[:, None, None].astype(np.float32))
+
+    # Random tie-break below any meaningful risk difference
+    score = risk + rng.random(risk.shape, dtype=np.float32) * 1e-4
+    score[~unknown] = np.inf
+    return score.reshape(len(games), -1).argmin(axis=1)
+
+
+def _distinct(indices: np.ndarray) -> np.ndarray:
+    # Sorted distinct values, by sorting: np.unique hashes, which is much
+    # slower on a few thousand indices spread over millions of cells
+    indices = np.sort(indices)
+    keep = np.empty(len(indices), dtype=bool)
+    keep[:1] = True
+    np.not_equal(indices[1:], indices[:-1], out=keep[1:])
+    return indices[keep]
+
+
+def _tally(indices: np.ndarray):
+    # Distinct values and how often each occurs, for `array[values] += counts`
+    # in place of the much slower ufunc.at
+    indices = np.sort(indices)
+    keep = np.empty(len(indices), dtype=bool)
+    keep[:1] = True
+    np.not_equal(indices[1:], indices[:-1], out=keep[1:])
+    starts = np.flatnonzero(keep)
+    return indices[starts], np.diff(starts, append=len(indices)).astype(np.int8)
+
+
+STRATEGIES = {"random": random_guess, "local": local_guess}
+
+
+def neighbor_table(height, width) -> np.ndarray:
+    """Flat index `i * width + j` of the 8 neighbours of every cell of a board, -1 off the board."""
+    table = np.full((height * width, len(NEIGHBOR_OFFSETS)), -1, dtype=np.intp)
+    i, j = np.divmod(np.arange(height * width), width)
+    for k, (di, dj) in enumerate(NEIGHBOR_OFFSETS):
+        ni = i + di
+        nj = j + dj
+        inside = (ni >= 0) & (ni < height) & (nj >= 0) & (nj < width)
+        table[inside, k] = (ni * width + nj)[inside]
+    return table
+
+
+class BoardBatch():
+    """Many Minesweeper games played at once on stacked NumPy boards.
+
+    Mines, neighbour counts, revealed cells and flags are `(games, height,
+    width)` arrays. Each step applies the single-number rules (a number
+    whose mines are all flagged makes its other neighbours safe, a number
+    needing all its unknown neighbours flags them) until nothing changes.
+    Boards with safe cells reveal all of them, and every other board
+    guesses with the strategy. Zero regions cascade open breadth-first,
+    one ring per iteration, on all boards together.
+
+    Work follows what changes rather than the size of the batch. Every
+    cell keeps how many of its neighbours are unknown and how many are
+    flagged, updated around each cell revealed or flagged, and the rules
+    only look again at the numbers next to such a cell. Cells are handled as
+    flat indices `game * height * width + i * width + j` into `flat_*`
+    arrays, of which the `(games, height, width)` arrays are views. A
+    missing neighbour is the sink, one more cell past the last board that
+    counts as revealed and never as unknown.
+    """
+
+    def __init__(self, games, height, width, mines, seed=None):
+        _check_mines(height, width, mines)
+        self.height = height
+        self.width = width
+        self.mines = mines
+        self.cells = height * width
+        self.rng = np.random.default_rng(seed)
+        self.table = neighbor_table(height, width)
+        size = games * self.cells
+        self.sink = size
+
+        # The `mines` smallest of one random key per cell: uniform placement
+        # without replacement on every board at once
+        keys = self.rng.random((games, self.cells))
+        chosen = np.argpartition(keys, mines - 1, axis=1)[:, :mines] if mines else np.empty((games, 0), int)
+        board = np.zeros((games, self.cells), dtype=bool)
+        np.put_along_axis(board, chosen, True, axis=1)
+        board = board.reshape(games, height, width)
+
+        def flat(values, sink):
+            array = np.empty(size + 1, dtype=values.dtype)
+            array[:size] = values.ravel()
+            array[size] = sink
+            return array, array[:size].reshape(games, height, width)
+
+        self.flat_board, self.board = flat(board, False)
+        self.flat_counts, self.counts = flat(neighbor_counts(board).astype(np.int8), 0)
+        self.flat_revealed, self.revealed = flat(np.zeros_like(board), True)
+        self.flat_flags, self.flags = flat(np.zeros_like(board), False)
+        # Neighbours on the board, all unknown at first
+        self.inside = (self.table >= 0).sum(axis=1).astype(np.int8).reshape(height, width)
+        self.flat_unknown_around, self.unknown_around = flat(np.broadcast_to(self.inside, board.shape), 0)
+        self.flat_flags_around, self.flags_around = flat(np.zeros(board.shape, dtype=np.int8), 0)
+
+        self.revealed_count = np.zeros(games, dtype=np.int64)
+        self.flag_count = np.zeros(games, dtype=np.int64)
+        self.lost = np.zeros(games, dtype=bool)
+        self.won = np.zeros(games, dtype=bool)
+        self.moves = np.zeros(games, dtype=np.int64)
+        self.guesses = np.zeros(games, dtype=np.int64)
+        # Flat indices of numbers the rules have to look at again
+        self.dirty = []
+
+    def __len__(self):
+        return len(self.lost)
+
+    @property
+    def running(self):
+        return ~self.lost & ~self.won
+
+    def neighbors(self, cells: np.ndarray) -> np.ndarray:
+        """`(len(cells), 8)` flat indices of the neighbours of flat `cells`, the sink off the board."""
+        base = cells - cells % self.cells
+        local = self.table[cells - base]
+        return np.where(local >= 0, base[:, None] + local, self.sink)
+
+    def unknown(self, cells: np.ndarray) -> np.ndarray:
+        return ~self.flat_revealed[cells] & ~self.flat_flags[cells]
+
+    def open(self, cells: np.ndarray):
+        """Reveal distinct unknown safe cells, given as flat indices, cascading zeros."""
+        while len(cells):
+            self.flat_revealed[cells] = True
+            self.revealed_count += np.bincount(cells // self.cells, minlength=len(self))
+            around = self.neighbors(cells)
+            touched, times = _tally(around.ravel())
+            self.flat_unknown_around[touched] -= times
+            self.dirty.append(cells)
+            self.dirty.append(touched)
+
+            # The next ring: unknown neighbours of the zeros just opened
+            ring = around[self.flat_counts[cells] == 0].ravel()
+            cells = _distinct(ring[self.unknown(ring)])
+
+    def flag(self, cells: np.ndarray):
+        """Flag distinct unknown cells, given as flat indices."""
+        self.flat_flags[cells] = True
+        self.flag_count += np.bincount(cells // self.cells, minlength=len(self))
+        touched, times = _tally(self.neighbors(cells).ravel())
+        self.flat_unknown_around[touched] -= times
+        self.flat_flags_around[touched] += times
+        self.dirty.append(touched)
+
+    def deduce(self) -> np.ndarray:
+        """Flag every mine the single-number rules find; return the safe cells found, as flat indices."""
+        running = self.running
+        looked_at = []
+        while self.dirty:
+            numbers = _distinct(np.concatenate(self.dirty))
+            self.dirty = []
+            # The sink sorts last; its counts are never read, so they may wrap
+            numbers = numbers[:np.searchsorted(numbers, self.sink)]
+            numbers = numbers[self.flat_revealed[numbers] & (self.flat_unknown_around[numbers] > 0)]
+            numbers = numbers[running[numbers // self.cells]]
+            looked_at.append(numbers)
+
+            missing = self.flat_counts[numbers] - self.flat_flags_around[numbers]
+            full = numbers[missing == self.flat_unknown_around[numbers]]
+            if len(full):
+                mines = self.neighbors(full).ravel()
+                self.flag(_distinct(mines[self.unknown(mines)]))
+
+        if not looked_at:
+            return np.empty(0, dtype=np.intp)
+        # With every flag placed, numbers with no mine missing clear their other neighbours
+        numbers = _distinct(np.concatenate(looked_at))
+        done = (self.flat_unknown_around[numbers] > 0) & (self.flat_counts[numbers] == self.flat_flags_around[numbers])
+        safe = self.neighbors(numbers[done]).ravel()
+        return _distinct(safe[self.unknown(safe)])
+
+    def step(self, strategy=local_guess) -> bool:
+        """Advance every running game by one move (or one round of safe moves)."""
+        running = self.running
+        if not running.any():
+            return False
+
+        safe = self.deduce()
+        safe_counts = np.bincount(safe // self.cells, minlength=len(self))
+        self.moves += safe_counts
+        self.open(safe)
+
+        guessing = np.nonzero(running & (safe_counts == 0))[0]
+        if len(guessing):
+            # Strategies get the whole batch and the boards they guess on
+            cells = guessing * self.cells + strategy(self, guessing, self.rng)
+            hit = self.flat_board[cells]
+            self.lost[guessing[hit]] = True
+            self.open(cells[~hit])
+            self.moves[guessing] += 1
+            self.guesses[guessing] += 1
+
+        self.won |= ~self.lost & (self.revealed_count == self.cells - self.mines)
+        return True
+
+    def run(self, strategy=local_guess):
+        while self.step(strategy):
+            pass
+
+
+def evaluate(games, height, width, mines, strategy="local", seed=0, chunk=4096):
+    """Score a guessing strategy over `games` boards, `chunk` at a time."""
+    strategy = STRATEGIES[strategy] if isinstance(strategy, str) else strategy
+
+    start = time.perf_counter()
+    wins = moves = guesses = 0
+    for offset in range(0, games, chunk):
+        # Finished games cost a step nothing but their share of a few
+        # per-game arrays, so the batch is never compacted
+        batch = BoardBatch(min(chunk, games - offset), height, width, mines, seed=(seed, offset))
+        batch.run(strategy)
+        wins += int(batch.won.sum())
+        moves += int(batch.moves.sum())
+        guesses += int(batch.guesses.sum())
+    elapsed = time.perf_counter() - start
+
+    return {
+        "games": games,
+        "wins": wins,
+        "win_rate": wins / games if games else 0.0,
+        "moves": moves,
+        "guesses": guesses,
+        "elapsed": elapsed,
+        "games_per_sec": games / elapsed if elapsed else 0.0,
+        "moves_per_sec": moves / elapsed if elapsed else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score guessing strategies on batches of NumPy boards.")
+    parser.add_argument("--games", type=int, default=10000)
+    parser.add_argument("--height", type=int, default=8)
+    parser.add_argument("--width", type=int, default=8)
+    parser.add_argument("--mines", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--chunk", type=int, default=4096, help="boards stacked per batch")
+    parser.add_argument("--strategy", choices=sorted(STRATEGIES), default="local")
+    args = parser.parse_args()
+
+    if not 0 <= args.mines < args.height * args.width:
+        parser.error("mines must leave at least one safe cell")
+
+    summary = evaluate(args.games, args.height, args.width, args.mines,
+                       strategy=args.strategy, seed=args.seed, chunk=args.chunk)
+
+    print(f"games:          {summary['games']} ({args.height}x{args.width}, {args.mines} mines, "
+          f"{args.strategy} guesses)")
+    print(f"win rate:       {summary['win_rate']:.1%} ({summary['wins']}/{summary['games']})")
+    print(f"games/sec:      {summary['games_per_sec']:.1f}")
+    print(f"moves/sec:      {summary['moves_per_sec']:.1f}")
+    print(f"guesses/game:   {summary['guesses'] / summary['games']:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+from collections import OrderedDict
+from typing import List, Tuple
+
+import solver
+
+# Components with more cells than this are not cached: they rarely repeat,
+# and every miss searches the whole component
+PATTERN_MAX_CELLS = 8
+
+# The 8 symmetries of the square (rotations and reflections) on a cell
+TRANSFORMS = (
+    lambda i, j: (i, j),
+    lambda i, j: (j, -i),
+    lambda i, j: (-i, -j),
+    lambda i, j: (-j, i),
+    lambda i, j: (i, -j),
+    lambda i, j: (-i, j),
+    lambda i, j: (j, i),
+    lambda i, j: (-j, -i),
+)
+
+
+def _positions(component: solver.Component, transform):
+    # Where the component's cells land once moved by `transform` and shifted
+    # so the smallest row and column are 0
+    moved = [transform(i, j) for i, j in component.cells]
+    top = min(i for i, _ in moved)
+    left = min(j for _, j in moved)
+    return [(i - top, j - left) for i, j in moved]
+
+
+def _key(component: solver.Component, positions):
+    # The constraints at the given positions: sorted cells and count per sentence
+    return tuple(sorted(
+        (tuple(sorted(positions[k] for k in indices)), count)
+        for indices, count in component.constraints
+    ))
+
+
+def _frame_key(sentences):
+    # `_key` of the sentences in the frame they came in (the identity
+    # symmetry), straight from their cells, with the row and column shifted off
+    rows = [(tuple(sentence), sentence.count) for sentence in sentences]
+    top = min(i for cells, _ in rows for i, _ in cells)
+    left = min(j for cells, _ in rows for _, j in cells)
+    key = tuple(sorted(
+        (tuple(sorted((i - top, j - left) for i, j in cells)), count)
+        for cells, count in rows
+    ))
+    return key, top, left
+
+
+def canonical(component: solver.Component):
+    """Key of a component's shape, the same under rotation and reflection.
+
+    Every symmetry of the square is applied to the cells, which are then
+    shifted so the smallest row and column are 0. The symmetries giving the
+    smallest sorted cells are kept, and the smallest encoding of their
+    constraints (sorted cells and count per sentence) is the key; only
+    symmetric cell sets need more than one encoded. Returns `(key,
+    positions)` where `positions[i]` is where `component.cells[i]` lands in
+    the key's frame.
+    """
+    framed = [(sorted(positions), positions)
+              for positions in (_positions(component, transform) for transform in TRANSFORMS)]
+    least = min(cells for cells, _ in framed)
+    return min(((_key(component, positions), positions) for cells, positions in framed if cells == least),
+               key=lambda keyed: keyed[0])
+
+
+class PatternCache():
+    """Forced safes and mines of small frontier components, by shape.
+
+    Shapes such as the 1-2-1 and 1-2-2-1 edge patterns recur within and
+    across games; a component whose canonical shape was solved before is
+    answered from the cache instead of by search. The answers are exact, so
+    they can hold cells the pairwise rules miss. Every answer is also
+    stored under the orientation the component came in, so a repeat in that
+    orientation is found without trying the 8 symmetries. Holds at most
+    `maxsize` keys, evicting the least recently used, and counts hits and
+    misses. One cache can be shared by any number of AIs.
+    """
+
+    def __init__(self, maxsize=8192, max_cells=PATTERN_MAX_CELLS):
+        self.maxsize = maxsize
+        self.max_cells = max_cells
+        # key -> (safe positions, mine positions) in the key's frame, most
+        # recently used last
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __store(self, key, cells, positions, safes, mines):
+        where = dict(zip(cells, positions))
+        self.entries[key] = (frozenset(where[cell] for cell in safes), frozenset(where[cell] for cell in mines))
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    def forced(self, component: solver.Component) -> Tuple[List[tuple], List[tuple]]:
+        """Cells of the component forced to be safe or mines, as `(safes, mines)`."""
+        positions = _positions(component, TRANSFORMS[0])
+        key = _key(component, positions)
+
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            safe_positions, mine_positions = entry
+            safes = [cell for cell, position in zip(component.cells, positions) if position in safe_positions]
+            mines = [cell for cell, position in zip(component.cells, positions) if position in mine_positions]
+            return safes, mines
+
+        # Not met in this orientation: look the shape up under every symmetry
+        shape, shape_positions = canonical(component)
+        entry = self.entries.get(shape)
+        if entry is not None:
+            self.hits += 1
+            safe_positions, mine_positions = entry
+            safes = [cell for cell, position in zip(component.cells, shape_positions)
+                     if position in safe_positions]
+            mines = [cell for cell, position in zip(component.cells, shape_positions)
+                     if position in mine_positions]
+        else:
+            self.misses += 1
+            result = solver.forced_cells(component, self.max_cells)
+            safes, mines = result if result is not None else ([], [])
+
+        self.__store(shape, component.cells, shape_positions, safes, mines)
+        self.__store(key, component.cells, positions, safes, mines)
+        return safes, mines
+
+    def forced_sentences(self, sentences) -> Tuple[List[tuple], List[tuple]]:
+        """`forced` for the sentences of one component, as the AI keeps them.
+
+        A repeat in the orientation the sentences come in is answered from
+        their cells alone; a component is only built when that misses.
+        """
+        key, top, left = _frame_key(sentences)
+        entry = self.entries.get(key)
+        if entry is None:
+            return self.forced(solver.frontier_components(sentences)[0])
+
+        self.hits += 1
+        self.entries.move_to_end(key)
+        safe_positions, mine_positions = entry
+        return ([(i + top, j + left) for i, j in safe_positions],
+                [(i + top, j + left) for i, j in mine_positions])
+
+    def clear(self):
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
@@ -0,0 +1,220 @@
+import argparse
+import random
+import time
+
+from minesweeper import MinesweeperAI
+
+# A log starts with MAGIC and a format version byte. Version 1 stored the
+# seed unsigned, so it could not record negative seeds; it is still read
+MAGIC = b"MSRL"
+VERSION = 2
+
+# Header flags
+CASCADE = 1       # revealing a cell flood fills its zero region
+MINE_TOTAL = 2    # the AI was told the number of mines
+BITSET = 4        # the AI used bitset sentences
+MATRIX = 8        # the AI used the matrix inference backend
+PATTERNS = 16     # the AI used a pattern cache
+
+BOARDS = ("list", "array", "sparse")
+
+
+def _write_varint(out: bytearray, value):
+    # Unsigned LEB128: 7 bits per byte, high bit set on all but the last
+    while value >= 0x80:
+        out.append(value & 0x7F | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _zigzag(value):
+    # Signed to unsigned, small magnitudes staying small: 0, -1, 1, -2 -> 0, 1, 2, 3
+    return value << 1 if value >= 0 else (-value << 1) - 1
+
+
+def _unzigzag(value):
+    return value >> 1 if not value & 1 else -(value >> 1) - 1
+
+
+def _read_varint(data, offset):
+    value = 0
+    shift = 0
+    while True:
+        if offset >= len(data):
+            raise EOFError("truncated varint")
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, offset
+        shift += 7
+
+
+class ReplayLog():
+    """Append-only log of one game: its seed and settings, then every move.
+
+    After MAGIC and the version byte, everything is an unsigned LEB128
+    varint: height, width, mines, seed (zigzag encoded, as it may be
+    negative), board kind and flags, then one
+    `(i * width + j) << 1 | by_ai` per move, so a move takes one to three
+    bytes. Every move is flushed as it is recorded: a run that crashes or is
+    killed still leaves a log of the moves it made.
+    """
+
+    def __init__(self, path, height, width, mines, seed, board="list", cascade=True,
+                 sentences="set", backend="pairwise", mine_total=True, patterns=False):
+        flags = 0
+        if cascade:
+            flags |= CASCADE
+        if mine_total:
+            flags |= MINE_TOTAL
+        if sentences == "bitset":
+            flags |= BITSET
+        if backend == "matrix":
+            flags |= MATRIX
+        if patterns:
+            flags |= PATTERNS
+
+        self.width = width
+        self.file = open(path, "wb")
+        header = bytearray(MAGIC)
+        header.append(VERSION)
+        for value in (height, width, mines, _zigzag(seed), BOARDS.index(board), flags):
+            _write_varint(header, value)
+        self.file.write(header)
+        self.file.flush()
+
+    def record(self, cell, by_ai=False):
+        record = bytearray()
+        _write_varint(record, (cell[0] * self.width + cell[1]) << 1 | by_ai)
+        self.file.write(record)
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+def read_log(path):
+    """Settings and moves of a replay log, as `(settings, [(cell, by_ai)])`.
+
+    A move cut short by a crash at the end of the log is ignored.
+    """
+    with open(path, "rb") as file:
+        data = file.read()
+    if data[:len(MAGIC)] != MAGIC:
+        raise ValueError("not a minesweeper replay log")
+    version = data[len(MAGIC)]
+    if version not in (1, VERSION):
+        raise ValueError(f"unsupported replay log version: {version}")
+
+    offset = len(MAGIC) + 1
+    header = []
+    for _ in range(6):
+        value, offset = _read_varint(data, offset)
+        header.append(value)
+    height, width, mines, seed, board, flags = header
+    if version > 1:
+        seed = _unzigzag(seed)
+
+    settings = {
+        "height": height,
+        "width": width,
+        "mines": mines,
+        "seed": seed,
+        "board": BOARDS[board],
+        "cascade": bool(flags & CASCADE),
+        "mine_total": bool(flags & MINE_TOTAL),
+        "sentences": "bitset" if flags & BITSET else "set",
+        "backend": "matrix" if flags & MATRIX else "pairwise",
+        "patterns": bool(flags & PATTERNS),
+    }
+
+    moves = []
+    while offset < len(data):
+        try:
+            value, offset = _read_varint(data, offset)
+        except EOFError:
+            break
+        moves.append((divmod(value >> 1, width), bool(value & 1)))
+
+    return settings, moves
+
+
+def replay(path, tracer=None):
+    """Rebuild the game recorded in a replay log, move by move.
+
+    The board and the AI share one `random.Random(seed)`, as when the game
+    was played, so moves the AI made are made again rather than read back;
+    a different move than the log's raises ValueError. An AI that used a
+    pattern cache gets a fresh one: cached answers are the ones a search
+    gives, so only the hit counts differ. Returns
+    `(game, ai, revealed)` as they were after the last move.
+    """
+    settings, moves = read_log(path)
+    height = settings["height"]
+    width = settings["width"]
+    mines = settings["mines"]
+
+    # simulate imports this module, so import it here
+    from simulate import make_game
+
+    patterns = None
+    if settings["patterns"]:
+        from patterns import PatternCache
+        patterns = PatternCache()
+
+    rng = random.Random(settings["seed"])
+    game = make_game(settings["board"], height, width, mines, tracer=tracer, rng=rng)
+    ai = MinesweeperAI(height=height, width=width, sentences=settings["sentences"], tracer=tracer,
+                       mines=mines if settings["mine_total"] else None,
+                       backend=settings["backend"], rng=rng, patterns=patterns)
+
+    revealed = {}
+    for n, (cell, by_ai) in enumerate(moves):
+        if by_ai:
+            move = ai.make_safe_move()
+            if move is None:
+                move = ai.make_random_move()
+            if move != cell:
+                raise ValueError(f"replay diverged at move {n}: logged {cell}, AI played {move}")
+
+        if game.is_mine(cell):
+            break
+
+        if settings["cascade"]:
+            uncovered = game.reveal(cell, revealed)
+        else:
+            uncovered = {cell: game.nearby_mines(cell)}
+        revealed.update(uncovered)
+        ai.add_knowledge_batch(uncovered.items())
+
+    return game, ai, revealed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a logged Minesweeper game.")
+    parser.add_argument("log", help="replay log written by ReplayLog")
+    args = parser.parse_args()
+
+    settings, moves = read_log(args.log)
+    start = time.perf_counter()
+    game, ai, revealed = replay(args.log)
+    elapsed = time.perf_counter() - start
+
+    safe_cells = settings["height"] * settings["width"] - settings["mines"]
+    lost = bool(moves) and game.is_mine(moves[-1][0])
+    outcome = "lost" if lost else "won" if len(revealed) == safe_cells else "unfinished"
+    print(f"game:     {settings['height']}x{settings['width']}, {settings['mines']} mines, seed {settings['seed']}")
+    print(f"moves:    {len(moves)} ({outcome})")
+    print(f"replayed: {elapsed * 1e3:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
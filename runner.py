@@ -1,5 +1,8 @@
-import pygame
+import argparse
+import queue
+import random
 import sys
+import threading
 import time
 
 from minesweeper import Minesweeper, MinesweeperAI
@@ -8,21 +11,138 @@ HEIGHT = 4
 WIDTH = 4
 MINES = 5
 
+# Frame rate cap; frames only redraw what changed
+FPS = 30
+
+# Seconds between two moves while the AI plays on its own
+AUTOPLAY_INTERVAL = 0.2
+
 # Colors
 BLACK = (0, 0, 0)
 GRAY = (180, 180, 180)
 WHITE = (255, 255, 255)
 
+# Assets, loaded on first use
+OPEN_SANS = "assets/fonts/OpenSans-Regular.ttf"
+IMAGES = {"flag": "assets/images/flag.png", "mine": "assets/images/mine.png"}
+SMALL, MEDIUM, LARGE = 20, 28, 40
+
+fonts = {}
+images = {}
+# Scaled sprites, keyed by (name, size)
+sprites = {}
+
+
+def font(size):
+    loaded = fonts.get(size)
+    if loaded is None:
+        loaded = fonts[size] = pygame.font.Font(OPEN_SANS, size)
+    return loaded
+
+
+def sprite(name, size):
+    scaled = sprites.get((name, size))
+    if scaled is None:
+        image = images.get(name)
+        if image is None:
+            image = images[name] = pygame.image.load(IMAGES[name])
+        scaled = sprites[(name, size)] = pygame.transform.scale(image, (size, size))
+    return scaled
+
+
+class Autoplayer(threading.Thread):
+    """Plays AI moves on a worker thread until stopped, lost or done.
+
+    The worker owns `game` and `ai` while it runs; the UI thread only reads
+    the moves it posts on `updates`, so inference never blocks rendering.
+    """
+
+    def __init__(self, game, ai, interval, revealed):
+        super().__init__(daemon=True)
+        self.game = game
+        self.ai = ai
+        self.interval = interval
+        self.revealed = set(revealed)
+        self.updates = queue.SimpleQueue()
+        self.stopped = threading.Event()
+
+    def stop(self):
+        self.stopped.set()
+
+    def run(self):
+        safe_cells = self.game.height * self.game.width - len(self.game.mines)
+        while not self.stopped.is_set():
+            if len(self.revealed) >= safe_cells:
+                self.updates.put(("done", self.ai.mines.copy()))
+                return
+
+            move = self.ai.make_safe_move()
+            if move is None:
+                move = self.ai.make_random_move()
+                if move is None:
+                    self.updates.put(("done", self.ai.mines.copy()))
+                    return
+
+            if self.game.is_mine(move):
+                self.updates.put(("lost", move))
+                return
+
+            uncovered = self.game.reveal(move, self.revealed)
+            self.revealed.update(uncovered)
+            self.ai.add_knowledge_batch(uncovered.items())
+            self.updates.put(("reveal", uncovered))
+
+            self.stopped.wait(self.interval)
+
+
+def play_headless(games, seed=None):
+    """Let the AI play `games` games with no display, as autoplay would."""
+    rng = random.Random(seed)
+    wins = 0
+    start = time.perf_counter()
+    for number in range(1, games + 1):
+        game = Minesweeper(height=HEIGHT, width=WIDTH, mines=MINES, rng=rng)
+        ai = MinesweeperAI(height=HEIGHT, width=WIDTH, mines=MINES, rng=rng)
+
+        # The autoplay loop itself, on this thread and without pauses
+        player = Autoplayer(game, ai, 0, {})
+        player.run()
+        moves = 0
+        while not player.updates.empty():
+            kind, _ = player.updates.get()
+            if kind != "done":
+                moves += 1
+        won = kind == "done"
+        wins += won
+        print(f"Game {number}: {'won' if won else 'lost'} after {moves} move{'' if moves == 1 else 's'}.")
+
+    elapsed = time.perf_counter() - start
+    print(f"Won {wins}/{games} games in {elapsed:.3f} s.")
+
+
+parser = argparse.ArgumentParser(description="Play Minesweeper, or watch the AI play.")
+parser.add_argument("--headless", action="store_true",
+                    help="no display: let the AI play and print the outcomes")
+parser.add_argument("--games", type=int, default=1, help="games to play headless")
+parser.add_argument("--seed", type=int, default=None, help="seed of the headless games")
+parser.add_argument("--interval", type=float, default=AUTOPLAY_INTERVAL,
+                    help="seconds between two autoplayed moves")
+args = parser.parse_args()
+if args.interval < 0:
+    parser.error("--interval cannot be negative")
+
+if args.headless:
+    play_headless(args.games, args.seed)
+    sys.exit()
+
+# Only the windowed game needs pygame
+import pygame
+
 # Create game
 pygame.init()
 size = width, height = 600, 400
 screen = pygame.display.set_mode(size)
-
-# Fonts
-OPEN_SANS = "assets/fonts/OpenSans-Regular.ttf"
-smallFont = pygame.font.Font(OPEN_SANS, 20)
-mediumFont = pygame.font.Font(OPEN_SANS, 28)
-largeFont = pygame.font.Font(OPEN_SANS, 40)
+clock = pygame.time.Clock()
 
 # Compute board size
 BOARD_PADDING = 20
@@ -31,192 +151,276 @@ board_height = height - (BOARD_PADDING * 2)
 cell_size = int(min(board_width / WIDTH, board_height / HEIGHT))
 board_origin = (BOARD_PADDING, BOARD_PADDING)
 
-# Add images
-flag = pygame.image.load("assets/images/flag.png")
-flag = pygame.transform.scale(flag, (cell_size, cell_size))
-mine = pygame.image.load("assets/images/mine.png")
-mine = pygame.transform.scale(mine, (cell_size, cell_size))
+# Layout never changes: compute every rectangle once
+cells = [
+    [
+        pygame.Rect(
+            board_origin[0] + j * cell_size,
+            board_origin[1] + i * cell_size,
+            cell_size, cell_size
+        )
+        for j in range(WIDTH)
+    ]
+    for i in range(HEIGHT)
+]
+playButton = pygame.Rect((width / 4), (3 / 4) * height, width / 2, 50)
+aiButton = pygame.Rect(
+    (2 / 3) * width + BOARD_PADDING, (1 / 3) * height - 50,
+    (width / 3) - BOARD_PADDING * 2, 50
+)
+resetButton = pygame.Rect(
+    (2 / 3) * width + BOARD_PADDING, (1 / 3) * height + 20,
+    (width / 3) - BOARD_PADDING * 2, 50
+)
+autoplayButton = pygame.Rect(
+    (2 / 3) * width + BOARD_PADDING, (1 / 3) * height + 90,
+    (width / 3) - BOARD_PADDING * 2, 50
+)
+statusRect = pygame.Rect((2 / 3) * width, (3 / 4) * height - 20, width / 3, 60)
+
+# Rendered text surfaces, keyed by (font size, text, color)
+text_cache = {}
+
+
+def render_text(size, text, color):
+    key = (size, text, color)
+    surface = text_cache.get(key)
+    if surface is None:
+        surface = text_cache[key] = font(size).render(text, True, color)
+    return surface
+
+
+def cell_at(position):
+    """Board cell under a screen position, or None."""
+    x, y = position
+    i = (y - board_origin[1]) // cell_size
+    j = (x - board_origin[0]) // cell_size
+    if 0 <= i < HEIGHT and 0 <= j < WIDTH:
+        return (int(i), int(j))
+    return None
+
+
+def draw_button(rect, label):
+    text = render_text(MEDIUM, label, BLACK)
+    textRect = text.get_rect()
+    textRect.center = rect.center
+    pygame.draw.rect(screen, WHITE, rect)
+    screen.blit(text, textRect)
+
+
+def draw_instructions():
+    screen.fill(BLACK)
+
+    # Title
+    title = render_text(LARGE, "Play Minesweeper", WHITE)
+    titleRect = title.get_rect()
+    titleRect.center = ((width / 2), 50)
+    screen.blit(title, titleRect)
+
+    # Rules
+    rules = [
+        "Click a cell to reveal it.",
+        "Right-click a cell to mark it as a mine.",
+        "Mark all mines successfully to win!"
+    ]
+    for i, rule in enumerate(rules):
+        line = render_text(SMALL, rule, WHITE)
+        lineRect = line.get_rect()
+        lineRect.center = ((width / 2), 150 + 30 * i)
+        screen.blit(line, lineRect)
+
+    # Play game button
+    draw_button(playButton, "Play Game")
+
+
+def draw_cell(cell):
+    rect = cells[cell[0]][cell[1]]
+    pygame.draw.rect(screen, GRAY, rect)
+    pygame.draw.rect(screen, WHITE, rect, 3)
+
+    # Add a mine, flag, or number if needed
+    if lost and game.is_mine(cell):
+        screen.blit(sprite("mine", cell_size), rect)
+    elif cell in flags:
+        screen.blit(sprite("flag", cell_size), rect)
+    elif cell in revealed:
+        neighbors = render_text(SMALL, str(revealed[cell]), BLACK)
+        neighborsTextRect = neighbors.get_rect()
+        neighborsTextRect.center = rect.center
+        screen.blit(neighbors, neighborsTextRect)
+
+    return rect
+
+
+def draw_status():
+    screen.fill(BLACK, statusRect)
+    text = "Lost" if lost else "Won" if game.mines == flags else ""
+    if text:
+        text = render_text(MEDIUM, text, WHITE)
+        textRect = text.get_rect()
+        textRect.center = statusRect.center
+        screen.blit(text, textRect)
+    return statusRect
+
+
+def draw_board():
+    screen.fill(BLACK)
+    for i in range(HEIGHT):
+        for j in range(WIDTH):
+            draw_cell((i, j))
+    draw_button(aiButton, "AI Move")
+    draw_button(resetButton, "Reset")
+    draw_button(autoplayButton, "Stop" if autoplayer is not None else "Autoplay")
+    draw_status()
+
 
 # Create game and AI agent
 game = Minesweeper(height=HEIGHT, width=WIDTH, mines=MINES)
-ai = MinesweeperAI(height=HEIGHT, width=WIDTH)
+ai = MinesweeperAI(height=HEIGHT, width=WIDTH, mines=MINES)
 
-# Keep track of revealed cells, flagged cells, and if a mine was hit
-revealed = set()
+# Keep track of revealed cells (with their counts), flagged cells, and if a mine was hit
+revealed = {}
 flags = set()
 lost = False
 
 # Show instructions initially
 instructions = True
 
+# Worker thread playing AI moves, while autoplay is on
+autoplayer = None
+
+# Whole screen to redraw, or only these cells
+redraw = True
+dirty = set()
+
 while True:
 
-    # Check if game quit
     for event in pygame.event.get():
+
+        # Check if game quit
         if event.type == pygame.QUIT:
             sys.exit()
 
-    screen.fill(BLACK)
-
-    # Show game instructions
-    if instructions:
-
-        # Title
-        title = largeFont.render("Play Minesweeper", True, WHITE)
-        titleRect = title.get_rect()
-        titleRect.center = ((width / 2), 50)
-        screen.blit(title, titleRect)
-
-        # Rules
-        rules = [
-            "Click a cell to reveal it.",
-            "Right-click a cell to mark it as a mine.",
-            "Mark all mines successfully to win!"
-        ]
-        for i, rule in enumerate(rules):
-            line = smallFont.render(rule, True, WHITE)
-            lineRect = line.get_rect()
-            lineRect.center = ((width / 2), 150 + 30 * i)
-            screen.blit(line, lineRect)
-
-        # Play game button
-        buttonRect = pygame.Rect((width / 4), (3 / 4) * height, width / 2, 50)
-        buttonText = mediumFont.render("Play Game", True, BLACK)
-        buttonTextRect = buttonText.get_rect()
-        buttonTextRect.center = buttonRect.center
-        pygame.draw.rect(screen, WHITE, buttonRect)
-        screen.blit(buttonText, buttonTextRect)
+        if event.type != pygame.MOUSEBUTTONDOWN:
+            continue
 
         # Check if play button clicked
-        click, _, _ = pygame.mouse.get_pressed()
-        if click == 1:
-            mouse = pygame.mouse.get_pos()
-            if buttonRect.collidepoint(mouse):
+        if instructions:
+            if event.button == 1 and playButton.collidepoint(event.pos):
                 instructions = False
-                time.sleep(0.3)
-
-        pygame.display.flip()
-        continue
-
-    # Draw board
-    cells = []
-    for i in range(HEIGHT):
-        row = []
-        for j in range(WIDTH):
-
-            # Draw rectangle for cell
-            rect = pygame.Rect(
-                board_origin[0] + j * cell_size,
-                board_origin[1] + i * cell_size,
-                cell_size, cell_size
-            )
-            pygame.draw.rect(screen, GRAY, rect)
-            pygame.draw.rect(screen, WHITE, rect, 3)
-
-            # Add a mine, flag, or number if needed
-            if game.is_mine((i, j)) and lost:
-                screen.blit(mine, rect)
-            elif (i, j) in flags:
-                screen.blit(flag, rect)
-            elif (i, j) in revealed:
-                neighbors = smallFont.render(
-                    str(game.nearby_mines((i, j))),
-                    True, BLACK
-                )
-                neighborsTextRect = neighbors.get_rect()
-                neighborsTextRect.center = rect.center
-                screen.blit(neighbors, neighborsTextRect)
-
-            row.append(rect)
-        cells.append(row)
-
-    # AI Move button
-    aiButton = pygame.Rect(
-        (2 / 3) * width + BOARD_PADDING, (1 / 3) * height - 50,
-        (width / 3) - BOARD_PADDING * 2, 50
-    )
-    buttonText = mediumFont.render("AI Move", True, BLACK)
-    buttonRect = buttonText.get_rect()
-    buttonRect.center = aiButton.center
-    pygame.draw.rect(screen, WHITE, aiButton)
-    screen.blit(buttonText, buttonRect)
-
-    # Reset button
-    resetButton = pygame.Rect(
-        (2 / 3) * width + BOARD_PADDING, (1 / 3) * height + 20,
-        (width / 3) - BOARD_PADDING * 2, 50
-    )
-    buttonText = mediumFont.render("Reset", True, BLACK)
-    buttonRect = buttonText.get_rect()
-    buttonRect.center = resetButton.center
-    pygame.draw.rect(screen, WHITE, resetButton)
-    screen.blit(buttonText, buttonRect)
-
-    # Display text
-    text = "Lost" if lost else "Won" if game.mines == flags else ""
-    text = mediumFont.render(text, True, WHITE)
-    textRect = text.get_rect()
-    textRect.center = ((5 / 6) * width, (2 / 3) * height)
-    screen.blit(text, textRect)
+                redraw = True
+            continue
 
-    move = None
+        move = None
+        clicked = cell_at(event.pos)
+
+        # Toggle autoplay
+        if event.button == 1 and autoplayButton.collidepoint(event.pos):
+            if autoplayer is not None:
+                autoplayer.stop()
+            elif not lost:
+                autoplayer = Autoplayer(game, ai, args.interval, revealed)
+                autoplayer.start()
+            redraw = True
+            continue
 
-    left, _, right = pygame.mouse.get_pressed()
+        # While autoplaying, the worker owns the game: only reset is allowed
+        if autoplayer is not None and not (event.button == 1 and resetButton.collidepoint(event.pos)):
+            continue
 
-    # Check for a right-click to toggle flagging
-    if right == 1 and not lost:
-        mouse = pygame.mouse.get_pos()
-        for i in range(HEIGHT):
-            for j in range(WIDTH):
-                if cells[i][j].collidepoint(mouse) and (i, j) not in revealed:
-                    if (i, j) in flags:
-                        flags.remove((i, j))
-                    else:
-                        flags.add((i, j))
-                    time.sleep(0.2)
+        # Check for a right-click to toggle flagging
+        if event.button == 3 and not lost:
+            if clicked is not None and clicked not in revealed:
+                if clicked in flags:
+                    flags.remove(clicked)
+                else:
+                    flags.add(clicked)
+                dirty.add(clicked)
 
-    elif left == 1:
-        mouse = pygame.mouse.get_pos()
+        elif event.button == 1:
 
-        # If AI button clicked, make an AI move
-        if aiButton.collidepoint(mouse) and not lost:
-            move = ai.make_safe_move()
-            if move is None:
-                move = ai.make_random_move()
+            # If AI button clicked, make an AI move
+            if aiButton.collidepoint(event.pos) and not lost:
+                move = ai.make_safe_move()
                 if move is None:
-                    flags = ai.mines.copy()
-                    print("No moves left to make.")
+                    move = ai.make_random_move()
+                    if move is None:
+                        flags = ai.mines.copy()
+                        redraw = True
+                        print("No moves left to make.")
+                    else:
+                        print("No known safe moves, AI making random move.")
                 else:
-                    print("No known safe moves, AI making random move.")
+                    print("AI making safe move.")
+
+            # Reset game state
+            elif resetButton.collidepoint(event.pos):
+                if autoplayer is not None:
+                    # It finishes its current move on the old game, then exits
+                    autoplayer.stop()
+                    autoplayer = None
+                game = Minesweeper(height=HEIGHT, width=WIDTH, mines=MINES)
+                ai = MinesweeperAI(height=HEIGHT, width=WIDTH, mines=MINES)
+                revealed = {}
+                flags = set()
+                lost = False
+                redraw = True
+                continue
+
+            # User-made move
+            elif not lost:
+                if (clicked is not None
+                        and clicked not in flags
+                        and clicked not in revealed):
+                    move = clicked
+
+        # Make move and update AI knowledge
+        if move:
+            if game.is_mine(move):
+                lost = True
+                redraw = True
             else:
-                print("AI making safe move.")
-            time.sleep(0.2)
-
-        # Reset game state
-        elif resetButton.collidepoint(mouse):
-            game = Minesweeper(height=HEIGHT, width=WIDTH, mines=MINES)
-            ai = MinesweeperAI(height=HEIGHT, width=WIDTH)
-            revealed = set()
-            flags = set()
-            lost = False
-            continue
-
-        # User-made move
-        elif not lost:
-            for i in range(HEIGHT):
-                for j in range(WIDTH):
-                    if (cells[i][j].collidepoint(mouse)
-                            and (i, j) not in flags
-                            and (i, j) not in revealed):
-                        move = (i, j)
-
-    # Make move and update AI knowledge
-    if move:
-        if game.is_mine(move):
-            lost = True
+                # Cascade through cells with no nearby mines
+                uncovered = game.reveal(move, revealed)
+                revealed.update(uncovered)
+                dirty.update(uncovered)
+                ai.add_knowledge_batch(uncovered.items())
+
+    # Show the moves the autoplayer made since the last frame
+    if autoplayer is not None:
+        while True:
+            try:
+                kind, payload = autoplayer.updates.get_nowait()
+            except queue.Empty:
+                break
+            if kind == "reveal":
+                revealed.update(payload)
+                dirty.update(payload)
+            elif kind == "lost":
+                lost = True
+                redraw = True
+            elif kind == "done":
+                flags = payload
+                redraw = True
+
+        # Stopped, lost or done: hand the game back to the UI
+        if not autoplayer.is_alive() and autoplayer.updates.empty():
+            autoplayer = None
+            redraw = True
+
+    if redraw:
+        if instructions:
+            draw_instructions()
         else:
-            nearby = game.nearby_mines(move)
-            revealed.add(move)
-            ai.add_knowledge(move, nearby)
+            draw_board()
+        pygame.display.flip()
+        redraw = False
+        dirty.clear()
+
+    elif dirty:
+        updated = [draw_cell(cell) for cell in dirty]
+        updated.append(draw_status())
+        pygame.display.update(updated)
+        dirty.clear()
 
-    pygame.display.flip()
+    clock.tick(FPS)
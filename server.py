@@ -0,0 +1,213 @@
+import argparse
+import asyncio
+import functools
+import json
+import random
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from minesweeper import Minesweeper, MinesweeperAI
+
+# Largest board a session may have: every cell costs memory on the board,
+# in the AI's pools and in every reply that reveals it
+MAX_CELLS = 100 * 100
+
+
+class Session():
+    """One game and the AI following it, as hosted by the server.
+
+    Methods run on executor threads; the server's per-session lock makes
+    sure only one of them runs at a time for a given session.
+    """
+
+    def __init__(self, height, width, mines, seed=None, sentences="set", backend="pairwise"):
+        rng = random.Random(seed)
+        self.game = Minesweeper(height=height, width=width, mines=mines, rng=rng)
+        self.ai = MinesweeperAI(height=height, width=width, sentences=sentences, mines=mines,
+                                backend=backend, rng=rng)
+        self.revealed = {}
+        self.lost = False
+        self.lock = asyncio.Lock()
+
+    @property
+    def won(self):
+        game = self.game
+        return not self.lost and len(self.revealed) == game.height * game.width - len(game.mines)
+
+    def reveal(self, cell):
+        if self.lost or self.won:
+            raise ValueError("game is over")
+        if not (0 <= cell[0] < self.game.height and 0 <= cell[1] < self.game.width):
+            raise ValueError(f"cell out of the board: {list(cell)}")
+
+        if self.game.is_mine(cell):
+            self.lost = True
+            return {"cell": list(cell), "lost": True, "won": False, "revealed": []}
+
+        uncovered = self.game.reveal(cell, self.revealed)
+        self.revealed.update(uncovered)
+        self.ai.add_knowledge_batch(uncovered.items())
+        return {
+            "cell": list(cell),
+            "lost": False,
+            "won": self.won,
+            "revealed": [[i, j, count] for (i, j), count in uncovered.items()],
+        }
+
+    def ai_move(self):
+        if self.lost or self.won:
+            raise ValueError("game is over")
+
+        move = self.ai.make_safe_move()
+        safe = move is not None
+        if move is None:
+            move = self.ai.make_random_move()
+            if move is None:
+                raise ValueError("no moves left to make")
+
+        result = self.reveal(move)
+        result["safe"] = safe
+        return result
+
+
+class GameServer():
+    """Hosts many sessions in one process behind a JSON-lines protocol.
+
+    Every request is one JSON object per line with an `op` (`create`,
+    `reveal`, `ai_move` or `close`) and, apart from `create`, a `session`.
+    Every response is one line with `ok` and, on failure, `error`; an `id`
+    given in a request is echoed back, since requests run concurrently and
+    responses come back in completion order. Sessions are built, and moves
+    run, on `executor` so a big board or a slow inference never stalls the
+    other sessions. Boards are limited to MAX_CELLS cells.
+    """
+
+    def __init__(self, executor=None):
+        self.executor = executor
+        self.sessions = {}
+        self.next_session = 1
+
+    async def handle(self, request):
+        op = request.get("op")
+
+        if op == "create":
+            height = int(request.get("height", 8))
+            width = int(request.get("width", 8))
+            if height < 1 or width < 1 or height * width > MAX_CELLS:
+                raise ValueError(f"board must have between 1 and {MAX_CELLS} cells: {height}x{width}")
+
+            # Building the board and the AI's cell pools takes a while on big boards
+            loop = asyncio.get_running_loop()
+            session = await loop.run_in_executor(
+                self.executor, functools.partial(
+                    Session, height, width, int(request.get("mines", 8)), seed=request.get("seed"),
+                    sentences=request.get("sentences", "set"),
+                    backend=request.get("backend", "pairwise")))
+            session_id = self.next_session
+            self.next_session += 1
+            self.sessions[session_id] = session
+            return {"session": session_id}
+
+        session_id = request.get("session")
+        session = self.sessions.get(session_id)
+        if session is None:
+            raise ValueError(f"unknown session: {session_id!r}")
+
+        if op == "close":
+            # Let moves already queued on the session finish first
+            async with session.lock:
+                self.sessions.pop(session_id, None)
+            return {"session": session_id}
+
+        if op == "reveal":
+            cell = tuple(request.get("cell", ()))
+            if len(cell) != 2:
+                raise ValueError("reveal needs a cell [i, j]")
+            move = session.reveal
+            args = (cell,)
+        elif op == "ai_move":
+            move = session.ai_move
+            args = ()
+        else:
+            raise ValueError(f"unknown op: {op!r}")
+
+        loop = asyncio.get_running_loop()
+        async with session.lock:
+            # Closed while this request waited its turn
+            if self.sessions.get(session_id) is not session:
+                raise ValueError(f"unknown session: {session_id!r}")
+            return await loop.run_in_executor(self.executor, move, *args)
+
+    async def respond(self, line, write):
+        request = {}
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("request must be a JSON object")
+            response = await self.handle(request)
+            response["ok"] = True
+        except Exception as error:
+            # Whatever went wrong, the client still gets its one reply
+            response = {"ok": False, "error": str(error) or type(error).__name__}
+        if "id" in request:
+            response["id"] = request["id"]
+        write((json.dumps(response) + "\n").encode())
+
+    async def serve(self, reader, write):
+        """Answer every request line from `reader` until it closes."""
+        tasks = set()
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            if not line.strip():
+                continue
+            task = asyncio.create_task(self.respond(line, write))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        if tasks:
+            await asyncio.wait(tasks)
+
+
+async def serve_stdio(server):
+    loop = asyncio.get_running_loop()
+    reader = asyncio.StreamReader()
+    await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin)
+
+    def write(data):
+        sys.stdout.buffer.write(data)
+        sys.stdout.buffer.flush()
+
+    await server.serve(reader, write)
+
+
+async def serve_tcp(server, host, port):
+    async def connection(reader, writer):
+        try:
+            await server.serve(reader, writer.write)
+        finally:
+            writer.close()
+
+    tcp = await asyncio.start_server(connection, host, port)
+    async with tcp:
+        await tcp.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Host Minesweeper sessions over JSON lines.")
+    parser.add_argument("--port", type=int, default=None,
+                        help="listen on this local TCP port instead of stdin/stdout")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--threads", type=int, default=None, help="executor threads for moves")
+    args = parser.parse_args()
+
+    with ThreadPoolExecutor(max_workers=args.threads) as executor:
+        server = GameServer(executor)
+        if args.port is None:
+            asyncio.run(serve_stdio(server))
+        else:
+            asyncio.run(serve_tcp(server, args.host, args.port))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+import argparse
+import math
+import multiprocessing
+import os
+import random
+import time
+
+import tracing
+from minesweeper import Minesweeper, MinesweeperAI
+
+
+def make_game(board, height, width, mines, tracer=None, rng=None):
+    """Build a `Minesweeper` board of the given storage kind."""
+    if board == "list":
+        return Minesweeper(height=height, width=width, mines=mines, tracer=tracer, rng=rng)
+
+    # NumPy is only needed for the other board kinds
+    from boards import ArrayMinesweeper, SparseMinesweeper
+    if board == "array":
+        return ArrayMinesweeper(height=height, width=width, mines=mines, tracer=tracer, rng=rng)
+    if board == "sparse":
+        return SparseMinesweeper(height=height, width=width, mines=mines, tracer=tracer, rng=rng)
+
+    raise ValueError(f"unknown board kind: {board!r}")
+
+
+# Pattern cache shared by every game a worker process plays
+_patterns = None
+
+
+def _pattern_cache():
+    global _patterns
+    if _patterns is None:
+        from patterns import PatternCache
+        _patterns = PatternCache()
+    return _patterns
+
+
+def play_game(height, width, mines, seed, sentences="set", stats=False, board="list",
+              cascade=True, backend="pairwise", log_dir=None, patterns=False):
+    """Play one seeded game of Minesweeper with MinesweeperAI, headless.
+
+    Returns a dict with the outcome, the number of moves made, the wall
+    time (in seconds) of every `add_knowledge` call and, with `stats`, the
+    solver's tracing counters and phase timings. With `cascade`, revealing a
+    cell with no nearby mines uncovers its whole zero region in one move.
+    With `log_dir`, the game is also recorded to `<log_dir>/<seed>.msr` (see
+    `replay.py`). With `patterns`, the AI uses a pattern cache shared with
+    the other games played by the same process.
+    """
+    # The board and the AI draw from one generator, which the seed alone fixes
+    rng = random.Random(seed)
+    tracer = tracing.Tracer(stats=stats)
+
+    log = None
+    if log_dir is not None:
+        from replay import ReplayLog
+        log = ReplayLog(os.path.join(log_dir, f"{seed}.msr"), height, width, mines, seed,
+                        board=board, cascade=cascade, sentences=sentences, backend=backend,
+                        patterns=patterns)
+
+    start = time.perf_counter()
+
+    game = make_game(board, height, width, mines, tracer=tracer, rng=rng)
+    ai = MinesweeperAI(height=height, width=width, sentences=sentences, tracer=tracer, mines=mines,
+                       backend=backend, rng=rng, patterns=_pattern_cache() if patterns else None)
+
+    safe_cells = height * width - mines
+    revealed = set()
+    moves = 0
+    won = False
+    knowledge_times = []
+
+    while True:
+        move = ai.make_safe_move()
+        if move is None:
+            move = ai.make_random_move()
+            if move is None:
+                break
+
+        moves += 1
+        if log is not None:
+            log.record(move, by_ai=True)
+        if game.is_mine(move):
+            break
+
+        if cascade:
+            uncovered = game.reveal(move, revealed)
+        else:
+            uncovered = {move: game.nearby_mines(move)}
+        t0 = time.perf_counter()
+        ai.add_knowledge_batch(uncovered.items())
+        knowledge_times.append(time.perf_counter() - t0)
+
+        revealed.update(uncovered)
+        if len(revealed) == safe_cells:
+            won = True
+            break
+
+    elapsed = time.perf_counter() - start
+    if log is not None:
+        log.close()
+
+    return {
+        "seed": seed,
+        "won": won,
+        "moves": moves,
+        "elapsed": elapsed,
+        "knowledge_times": knowledge_times,
+        "counters": tracer.counters,
+        "timings": tracer.timings,
+    }
+
+
+def _play_game(args):
+    return play_game(*args)
+
+
+def percentile(values, q):
+    """Nearest-rank percentile of an already sorted list."""
+    if not values:
+        return 0.0
+    rank = math.ceil(q / 100 * len(values))
+    return values[max(0, min(len(values), rank) - 1)]
+
+
+def simulate(games, height, width, mines, seed=0, workers=None, sentences="set", stats=False,
+             board="list", cascade=True, backend="pairwise", log_dir=None, patterns=False):
+    """Play `games` seeded games across a process pool and summarize them."""
+    if log_dir is not None:
+        os.makedirs(log_dir, exist_ok=True)
+    jobs = [(height, width, mines, seed + n, sentences, stats, board, cascade, backend, log_dir,
+             patterns)
+            for n in range(games)]
+
+    start = time.perf_counter()
+    with multiprocessing.Pool(processes=workers) as pool:
+        results = list(pool.imap_unordered(_play_game, jobs, chunksize=max(1, games // 64)))
+    elapsed = time.perf_counter() - start
+
+    wins = sum(1 for result in results if result["won"])
+    moves = sum(result["moves"] for result in results)
+    knowledge_times = sorted(t for result in results for t in result["knowledge_times"])
+
+    tracer = tracing.Tracer()
+    for result in results:
+        tracer.merge(result["counters"], result["timings"])
+
+    return {
+        "games": games,
+        "height": height,
+        "width": width,
+        "mines": mines,
+        "sentences": sentences,
+        "board": board,
+        "cascade": cascade,
+        "backend": backend,
+        "patterns": patterns,
+        "wins": wins,
+        "moves": moves,
+        "win_rate": wins / games if games else 0.0,
+        "elapsed": elapsed,
+        "games_per_sec": games / elapsed if elapsed else 0.0,
+        "moves_per_sec": moves / elapsed if elapsed else 0.0,
+        "add_knowledge_calls": len(knowledge_times),
+        "add_knowledge_p50": percentile(knowledge_times, 50),
+        "add_knowledge_p99": percentile(knowledge_times, 99),
+        "counters": tracer.counters,
+        "timings": tracer.timings,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Play seeded MinesweeperAI games headless.")
+    parser.add_argument("--games", type=int, default=100)
+    parser.add_argument("--height", type=int, default=8)
+    parser.add_argument("--width", type=int, default=8)
+    parser.add_argument("--mines", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first game")
+    parser.add_argument("--workers", type=int, default=None, help="defaults to the CPU count")
+    parser.add_argument("--sentences", choices=("set", "bitset"), default="set",
+                        help="sentence representation used by the AI")
+    parser.add_argument("--backend", choices=("pairwise", "matrix"), default="pairwise",
+                        help="inference backend used by the AI")
+    parser.add_argument("--board", choices=("list", "array", "sparse"), default="list",
+                        help="board storage (array and sparse need NumPy installed)")
+    parser.add_argument("--no-cascade", dest="cascade", action="store_false",
+                        help="reveal one cell per move, without flood filling zero regions")
+    parser.add_argument("--stats", action="store_true",
+                        help="collect solver counters and per-phase timings")
+    parser.add_argument("--patterns", action="store_true",
+                        help="solve small components near new cells through a pattern cache")
+    parser.add_argument("--log-dir", default=None,
+                        help="record every game to a replay log in this directory")
+    args = parser.parse_args()
+
+    if not 0 <= args.mines < args.height * args.width:
+        parser.error("mines must leave at least one safe cell")
+
+    summary = simulate(args.games, args.height, args.width, args.mines,
+                       seed=args.seed, workers=args.workers, sentences=args.sentences, stats=args.stats, board=args.board,
+                       cascade=args.cascade, backend=args.backend, log_dir=args.log_dir,
+                       patterns=args.patterns)
+
+    print(f"games:          {summary['games']} ({summary['height']}x{summary['width']}, {summary['mines']} mines, "
+          f"{summary['board']} board, {summary['sentences']} sentences, {summary['backend']} inference)")
+    print(f"win rate:       {summary['win_rate']:.1%} ({summary['wins']}/{summary['games']})")
+    print(f"games/sec:      {summary['games_per_sec']:.1f}")
+    print(f"moves/game:     {summary['moves'] / summary['games']:.1f}")
+    print(f"moves/sec:      {summary['moves_per_sec']:.1f}")
+    print(f"add_knowledge:  p50 {summary['add_knowledge_p50'] * 1e3:.3f} ms, "
+          f"p99 {summary['add_knowledge_p99'] * 1e3:.3f} ms "
+          f"over {summary['add_knowledge_calls']} calls")
+
+    if args.stats:
+        tracer = tracing.Tracer()
+        tracer.merge(summary["counters"], summary["timings"])
+        print(tracer.report())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,324 @@
+from typing import Dict, List, Optional, Tuple
+
+# Components with more cells than this are not solved (the search, and the
+# count over many open constraints, are exponential in the worst case);
+# their cells get no exact probability
+MAX_COMPONENT_CELLS = 48
+
+# Components with fewer cells than this are solved in-process even when an
+# executor is given: shipping them to a worker costs more than solving them
+PARALLEL_MIN_CELLS = 16
+
+
+class Component():
+    """An independent part of the frontier.
+
+    `cells` lists the unknown cells of the component and `constraints` holds
+    one `(indices, count)` pair per sentence, where `indices` point into
+    `cells`. Only tuples and ints are kept, so components pickle cheaply.
+    """
+
+    __slots__ = ("cells", "constraints")
+
+    def __init__(self, cells, constraints):
+        self.cells = cells
+        self.constraints = constraints
+
+    def __len__(self):
+        return len(self.cells)
+
+
+def frontier_components(sentences) -> List[Component]:
+    """Split the unresolved sentences into components sharing no cell.
+
+    Sentences only need to be iterable over their cells and carry a `count`.
+    """
+    sentences = [(tuple(sentence), sentence.count) for sentence in sentences]
+    sentences = [(cells, count) for cells, count in sentences if cells]
+
+    by_cell: Dict[tuple, List[int]] = {}
+    for index, (cells, _) in enumerate(sentences):
+        for cell in cells:
+            by_cell.setdefault(cell, []).append(index)
+
+    components = []
+    visited = [False] * len(sentences)
+    for start in range(len(sentences)):
+        if visited[start]:
+            continue
+
+        # Breadth-first over sentences sharing cells; cells are numbered in
+        # discovery order, which keeps the backtracking below local
+        visited[start] = True
+        queue = [start]
+        cells = {}
+        constraints = []
+        for index in queue:
+            sentence_cells, count = sentences[index]
+            for cell in sentence_cells:
+                if cell not in cells:
+                    cells[cell] = len(cells)
+                for other in by_cell[cell]:
+                    if not visited[other]:
+                        visited[other] = True
+                        queue.append(other)
+            constraints.append((tuple(cells[cell] for cell in sentence_cells), count))
+
+        components.append(Component(tuple(cells), tuple(constraints)))
+
+    return components
+
+
+def _shifted_add(total: List[int], ways: List[int], shift):
+    # total += ways * x**shift, over polynomials in the number of mines
+    if len(total) < len(ways) + shift:
+        total.extend([0] * (len(ways) + shift - len(total)))
+    for k, count in enumerate(ways):
+        total[k + shift] += count
+
+
+def _count_forward(component: Component, counted=None):
+    # Forward pass of count_configurations: forward[i][state] holds the ways
+    # of deciding the cells before i, by number of mines, and advance(i,
+    # state, value) is the state after deciding cell i (None when a
+    # constraint can no longer hold)
+    size = len(component.cells)
+    counts = [count for _, count in component.constraints]
+    first = [min(indices) for indices, _ in component.constraints]
+    last = [max(indices) for indices, _ in component.constraints]
+    cell_constraints = [[] for _ in range(size)]
+    # undecided[c][i]: cells of constraint c after cell i
+    undecided = []
+    for index, (indices, _) in enumerate(component.constraints):
+        for i in indices:
+            cell_constraints[i].append(index)
+        after = [0] * size
+        for position, i in enumerate(sorted(indices)):
+            after[i] = len(indices) - position - 1
+        undecided.append(after)
+
+    # Mines a cell adds to k when it holds one
+    shifts = [1 if counted is None or i in counted else 0 for i in range(size)]
+
+    # States before cell i are the remaining counts of opened[i], in order
+    opened = [[c for c in range(len(counts)) if first[c] < i <= last[c]] for i in range(size + 1)]
+
+    # Per cell, precomputed: where each of its constraints is read from (a
+    # state slot, or -1 when it opens there), and where each slot of the
+    # next state comes from (one of those constraints, or the same state)
+    checks = []
+    layouts = []
+    for i in range(size):
+        slots = {c: slot for slot, c in enumerate(opened[i])}
+        checks.append([(slots.get(c, -1), counts[c], undecided[c][i]) for c in cell_constraints[i]])
+        positions = {c: position for position, c in enumerate(cell_constraints[i])}
+        layouts.append([(True, positions[c]) if c in positions else (False, slots[c]) for c in opened[i + 1]])
+
+    def advance(i, state, value):
+        remaining = []
+        for slot, count, after in checks[i]:
+            left = (state[slot] if slot >= 0 else count) - value
+            if left < 0 or left > after:
+                return None
+            remaining.append(left)
+        return tuple(remaining[k] if fresh else state[k] for fresh, k in layouts[i])
+
+    forward = [{(): [1]}]
+    for i in range(size):
+        layer = {}
+        for state, ways in forward[i].items():
+            for value in (0, 1):
+                target = advance(i, state, value)
+                if target is not None:
+                    _shifted_add(layer.setdefault(target, []), ways, value * shifts[i])
+        forward.append(layer)
+    return forward, advance, shifts
+
+
+def count_solutions(component: Component, max_cells=MAX_COMPONENT_CELLS, counted=None
+                    ) -> Optional[Dict[int, int]]:
+    """The `solutions` of `count_configurations` alone, at half the cost."""
+    if len(component.cells) > max_cells:
+        return None
+    forward, _, _ = _count_forward(component, counted)
+    return {k: ways for k, ways in enumerate(forward[-1].get((), ())) if ways}
+
+
+def count_configurations(component: Component, max_cells=MAX_COMPONENT_CELLS, counted=None
+                         ) -> Optional[Tuple[Dict[int, int], Dict[int, List[int]]]]:
+    """Count every mine placement satisfying the component's constraints.
+
+    Returns `(solutions, mine_counts)`: `solutions[k]` is the number of
+    placements using exactly `k` mines and `mine_counts[k][i]` how many of
+    those put a mine on `component.cells[i]`. With `counted`, a set of
+    indices into `component.cells`, `k` only counts the mines on those
+    cells. Returns None when the component is larger than `max_cells`.
+
+    Cells are decided in order, and placements only matter through the
+    mines each open constraint (some of its cells decided, some not) still
+    needs: a forward pass counts the ways of reaching every such state, per
+    number of mines, and a backward pass the ways of completing it. Loose
+    constraints multiply placements but not states, so a component with
+    millions of placements is counted without enumerating them.
+    """
+    size = len(component.cells)
+    if size > max_cells:
+        return None
+
+    forward, advance, shifts = _count_forward(component, counted)
+
+    # backward[state]: ways of deciding cells from i on, for the states of forward[i]
+    backward = {(): [1]}
+    mine_ways: List[List[int]] = [[] for _ in range(size)]
+    for i in range(size - 1, -1, -1):
+        layer = {}
+        for state, ways in forward[i].items():
+            completions = []
+            for value in (0, 1):
+                target = advance(i, state, value)
+                rest = backward.get(target) if target is not None else None
+                if rest is None:
+                    continue
+                _shifted_add(completions, rest, value * shifts[i])
+                if value:
+                    # Placements through this state with a mine on cell i
+                    for k, count in enumerate(ways):
+                        if count:
+                            _shifted_add(mine_ways[i], [count * other for other in rest], k + shifts[i])
+            if completions:
+                layer[state] = completions
+        backward = layer
+
+    solutions: Dict[int, int] = {}
+    mine_counts: Dict[int, List[int]] = {}
+    for k, ways in enumerate(forward[size].get((), ())):
+        if ways:
+            solutions[k] = ways
+            mine_counts[k] = [mine_ways[i][k] if k < len(mine_ways[i]) else 0 for i in range(size)]
+    return solutions, mine_counts
+
+
+def _find_solution(component: Component, fixed=None) -> Optional[List[int]]:
+    # First mine placement satisfying the constraints (0/1 per cell), with
+    # `fixed = (index, value)` forcing one cell; None when there is none
+    size = len(component.cells)
+    cell_constraints = [[] for _ in range(size)]
+    remaining = []
+    unassigned = []
+    for index, (indices, count) in enumerate(component.constraints):
+        for i in indices:
+            cell_constraints[i].append(index)
+        remaining.append(count)
+        unassigned.append(len(indices))
+
+    order = list(range(size))
+    values = [(0, 1)] * size
+    if fixed is not None:
+        # Decide the fixed cell first so the search prunes around it early
+        order.remove(fixed[0])
+        order.insert(0, fixed[0])
+        values[fixed[0]] = (fixed[1],)
+
+    assignment = [0] * size
+
+    def assign(position):
+        if position == size:
+            return True
+
+        i = order[position]
+        for value in values[i]:
+            feasible = True
+            for c in cell_constraints[i]:
+                unassigned[c] -= 1
+                remaining[c] -= value
+                if remaining[c] < 0 or remaining[c] > unassigned[c]:
+                    feasible = False
+
+            if feasible:
+                assignment[i] = value
+                if assign(position + 1):
+                    return True
+
+            for c in cell_constraints[i]:
+                unassigned[c] += 1
+                remaining[c] += value
+
+        return False
+
+    if assign(0):
+        return assignment
+    return None
+
+
+def forced_cells(component: Component, max_cells=MAX_COMPONENT_CELLS
+                 ) -> Optional[Tuple[List[tuple], List[tuple]]]:
+    """Cells that are safe, or mines, in every valid placement.
+
+    Cheaper than counting: every solution found marks the value each cell
+    took, and each cell that has only shown one value gets a single search
+    for a solution with the other. Returns `(safes, mines)`, or None when the
+    component is larger than `max_cells` or has no solution at all.
+    """
+    size = len(component.cells)
+    if size > max_cells:
+        return None
+
+    solution = _find_solution(component)
+    if solution is None:
+        return None
+
+    # Bit 1: seen safe, bit 2: seen a mine
+    seen = [1 << value for value in solution]
+    for i in range(size):
+        if seen[i] == 3:
+            continue
+        solution = _find_solution(component, (i, 1 if seen[i] == 1 else 0))
+        if solution is not None:
+            for j, value in enumerate(solution):
+                seen[j] |= 1 << value
+
+    safes = [cell for cell, values in zip(component.cells, seen) if values == 1]
+    mines = [cell for cell, values in zip(component.cells, seen) if values == 2]
+    return safes, mines
+
+
+def _solve_indices(solve, size, constraints, max_cells):
+    # Worker side: rebuild the component over its own cell indices, so only
+    # the constraints travel to the worker and results come back as indices
+    return solve(Component(range(size), constraints), max_cells)
+
+
+def map_components(solve, components, executor=None, max_cells=MAX_COMPONENT_CELLS):
+    """Yield `(component, solve(component, max_cells))` for every component small enough.
+
+    Results refer to cells by their index in `component.cells`. Large
+    components go to the executor first, small ones are solved here meanwhile.
+    """
+    submitted = []
+    inline = []
+    for component in components:
+        size = len(component.cells)
+        if size > max_cells:
+            continue
+        if executor is not None and size >= PARALLEL_MIN_CELLS:
+            future = executor.submit(_solve_indices, solve, size, component.constraints, max_cells)
+            submitted.append((component, future))
+        else:
+            inline.append(component)
+
+    for component in inline:
+        yield component, _solve_indices(solve, len(component.cells), component.constraints, max_cells)
+    for component, future in submitted:
+        yield component, future.result()
+
+
+def frontier_forced_cells(components, max_cells=MAX_COMPONENT_CELLS, executor=None
+                          ) -> Tuple[List[tuple], List[tuple]]:
+    """`forced_cells` over many components, large ones in parallel on `executor`."""
+    safes = []
+    mines = []
+    for component, result in map_components(forced_cells, components, executor, max_cells):
+        if result is not None:
+            safes.extend(component.cells[i] for i in result[0])
+            mines.extend(component.cells[i] for i in result[1])
+    return safes, mines
@@ -0,0 +1,83 @@
+import random
+
+import pytest
+
+import checkpoint
+from minesweeper import Minesweeper, MinesweeperAI
+
+
+def play(game, ai, revealed, moves=None):
+    # Moves the AI makes from here, until the game ends or `moves` are made
+    played = []
+    while moves is None or len(played) < moves:
+        move = ai.make_safe_move()
+        if move is None:
+            move = ai.make_random_move()
+            if move is None:
+                break
+        played.append(move)
+        if game.is_mine(move):
+            break
+        uncovered = game.reveal(move, revealed)
+        revealed.update(uncovered)
+        ai.add_knowledge_batch(uncovered.items())
+        if len(revealed) == game.height * game.width - len(game.mines):
+            break
+    return played
+
+
+def test_game_round_trip():
+    game = Minesweeper(height=9, width=13, mines=20, rng=random.Random(1))
+    game.mines_found = {next(iter(game.mines))}
+
+    restored = checkpoint.loads(checkpoint.dumps(game))
+    assert (restored.height, restored.width) == (9, 13)
+    assert restored.mines == game.mines
+    assert restored.board == game.board
+    assert restored.mines_found == game.mines_found
+
+
+@pytest.mark.parametrize("sentences", ("set", "bitset"))
+@pytest.mark.parametrize("seed", range(10))
+@pytest.mark.parametrize("saved_after", (3, 12))
+def test_restored_ai_plays_the_same_moves(sentences, seed, saved_after):
+    rng = random.Random(seed)
+    game = Minesweeper(height=16, width=16, mines=40, rng=rng)
+    ai = MinesweeperAI(height=16, width=16, sentences=sentences, mines=40, rng=rng)
+    revealed = {}
+    played = play(game, ai, revealed, saved_after)
+    if len(played) < saved_after:
+        pytest.skip("game over before the checkpoint")
+
+    snapshot = checkpoint.dumps(ai)
+    state = rng.getstate()
+    saved_revealed = dict(revealed)
+    expected = play(game, ai, revealed)
+
+    resumed_rng = random.Random()
+    resumed_rng.setstate(state)
+    restored = checkpoint.loads(snapshot, rng=resumed_rng)
+    assert play(game, restored, saved_revealed) == expected
+
+
+def test_restored_ai_keeps_its_state():
+    rng = random.Random(7)
+    game = Minesweeper(height=16, width=30, mines=99, rng=rng)
+    ai = MinesweeperAI(height=16, width=30, sentences="bitset", mines=99, backend="matrix", rng=rng)
+    play(game, ai, {}, 10)
+
+    restored = checkpoint.loads(checkpoint.dumps(ai))
+    assert (restored.sentences, restored.backend, restored.total_mines) == ("bitset", "matrix", 99)
+    assert restored.moves_made == ai.moves_made
+    assert restored.mines == ai.mines
+    assert restored.safes == ai.safes
+    assert list(restored.safe_queue) == list(ai.safe_queue)
+    assert list(restored.unknowns) == list(ai.unknowns)
+    assert restored.knowledge == ai.knowledge
+
+
+def test_rejects_other_data():
+    with pytest.raises(ValueError):
+        checkpoint.loads(b"XXXX\x01A")
+    with pytest.raises(TypeError):
+        checkpoint.dumps(object())
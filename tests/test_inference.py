@@ -0,0 +1,113 @@
+import random
+
+import pytest
+
+import solver
+from minesweeper import Minesweeper, MinesweeperAI
+from patterns import PatternCache
+
+SETTINGS = [
+    {"sentences": "set", "backend": "pairwise"},
+    {"sentences": "bitset", "backend": "pairwise"},
+    {"sentences": "set", "backend": "matrix"},
+    {"sentences": "set", "backend": "pairwise", "patterns": True},
+]
+
+
+def make_ai(height, width, mines, settings, rng=None):
+    settings = dict(settings)
+    patterns = PatternCache() if settings.pop("patterns", False) else None
+    return MinesweeperAI(height=height, width=width, mines=mines, rng=rng, patterns=patterns, **settings)
+
+
+def assert_sound(game, ai):
+    assert all(game.is_mine(cell) for cell in ai.mines)
+    assert not any(game.is_mine(cell) for cell in ai.safes)
+
+
+def random_observations(game, rng, least=1):
+    # A random share of the safe cells with their counts, in random order
+    safe = [(i, j) for i in range(game.height) for j in range(game.width) if not game.is_mine((i, j))]
+    cells = rng.sample(safe, rng.randrange(least, len(safe) + 1))
+    return [(cell, game.nearby_mines(cell)) for cell in cells]
+
+
+@pytest.mark.parametrize("settings", SETTINGS)
+@pytest.mark.parametrize("seed", range(10))
+def test_play_is_sound(settings, seed):
+    # Every cell marked during a whole game agrees with the real board
+    rng = random.Random(seed)
+    game = Minesweeper(height=16, width=16, mines=40, rng=rng)
+    ai = make_ai(16, 16, 40, settings, rng)
+
+    revealed = {}
+    while True:
+        move = ai.make_safe_move()
+        if move is None:
+            move = ai.make_random_move()
+            if move is None:
+                break
+        if game.is_mine(move):
+            break
+        uncovered = game.reveal(move, revealed)
+        revealed.update(uncovered)
+        ai.add_knowledge_batch(uncovered.items())
+        assert_sound(game, ai)
+        if len(revealed) == 16 * 16 - 40:
+            break
+
+
+@pytest.mark.parametrize("settings", SETTINGS)
+@pytest.mark.parametrize("seed", range(20))
+def test_observations_are_sound(settings, seed):
+    rng = random.Random(seed)
+    game = Minesweeper(height=16, width=30, mines=99, rng=rng)
+    observations = random_observations(game, rng)
+
+    batched = make_ai(16, 30, 99, settings)
+    batched.add_knowledge_batch(observations)
+    assert_sound(game, batched)
+
+    one_by_one = make_ai(16, 30, 99, settings)
+    for cell, count in observations:
+        one_by_one.add_knowledge(cell, count)
+        assert_sound(game, one_by_one)
+
+
+def small_board(seed):
+    # An 8x8 game and at least 16 of its safe cells: at most 48 cells are
+    # left unknown, so the batch's exact pass covers every component
+    rng = random.Random(seed)
+    game = Minesweeper(height=8, width=8, mines=rng.randrange(6, 16), rng=rng)
+    return game, random_observations(game, rng, least=16)
+
+
+@pytest.mark.parametrize("settings", SETTINGS)
+@pytest.mark.parametrize("seed", range(40))
+def test_batch_finds_what_single_cells_find(settings, seed):
+    game, observations = small_board(seed)
+
+    batched = make_ai(8, 8, len(game.mines), settings)
+    batched.add_knowledge_batch(observations)
+    one_by_one = make_ai(8, 8, len(game.mines), settings)
+    for cell, count in observations:
+        one_by_one.add_knowledge(cell, count)
+
+    assert one_by_one.safes <= batched.safes
+    assert one_by_one.mines <= batched.mines
+
+
+@pytest.mark.parametrize("settings", SETTINGS)
+@pytest.mark.parametrize("seed", range(40))
+def test_batch_leaves_nothing_forced(settings, seed):
+    # Whatever a search of the remaining knowledge proves, the batch marked
+    # (both skip components over solver.MAX_COMPONENT_CELLS)
+    rng = random.Random(seed)
+    game = Minesweeper(height=16, width=16, mines=rng.randrange(30, 60), rng=rng)
+    observations = random_observations(game, rng)
+
+    batched = make_ai(16, 16, len(game.mines), settings)
+    batched.add_knowledge_batch(observations)
+
+    components = solver.frontier_components(batched.knowledge)
+    assert solver.frontier_forced_cells(components) == ([], [])
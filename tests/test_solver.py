@@ -0,0 +1,105 @@
+import itertools
+import random
+
+import pytest
+
+import linear_solver
+import solver
+
+
+def random_component(rng, feasible=True):
+    # Up to 10 cells under random constraints; counts come from a hidden
+    # placement unless `feasible` is False
+    size = rng.randrange(1, 11)
+    hidden = [rng.random() < 0.4 for _ in range(size)]
+    constraints = []
+    for _ in range(rng.randrange(1, 6)):
+        indices = tuple(rng.sample(range(size), rng.randrange(1, min(size, 5) + 1)))
+        count = sum(hidden[i] for i in indices) if feasible else rng.randrange(len(indices) + 1)
+        constraints.append((indices, count))
+    return solver.Component(tuple((0, i) for i in range(size)), tuple(constraints))
+
+
+def placements(component):
+    # Every mine placement satisfying the constraints, by brute force
+    for values in itertools.product((0, 1), repeat=len(component.cells)):
+        if all(sum(values[i] for i in indices) == count for indices, count in component.constraints):
+            yield values
+
+
+def brute_counts(component, counted=None):
+    solutions = {}
+    mine_counts = {}
+    for values in placements(component):
+        k = sum(value for i, value in enumerate(values) if counted is None or i in counted)
+        solutions[k] = solutions.get(k, 0) + 1
+        counts = mine_counts.setdefault(k, [0] * len(values))
+        for i, value in enumerate(values):
+            counts[i] += value
+    return solutions, mine_counts
+
+
+def brute_forced(component):
+    found = list(placements(component))
+    if not found:
+        return None
+    safes = [cell for i, cell in enumerate(component.cells) if all(values[i] == 0 for values in found)]
+    mines = [cell for i, cell in enumerate(component.cells) if all(values[i] == 1 for values in found)]
+    return safes, mines
+
+
+@pytest.mark.parametrize("seed", range(200))
+def test_count_configurations_matches_brute_force(seed):
+    rng = random.Random(seed)
+    component = random_component(rng, feasible=rng.random() < 0.8)
+    expected = brute_counts(component)
+
+    if not expected[0]:
+        assert solver.count_configurations(component) == ({}, {})
+    else:
+        assert solver.count_configurations(component) == expected
+    assert solver.count_solutions(component) == expected[0]
+
+
+@pytest.mark.parametrize("seed", range(100))
+def test_counted_cells_match_brute_force(seed):
+    rng = random.Random(seed)
+    component = random_component(rng)
+    counted = set(rng.sample(range(len(component.cells)), rng.randrange(len(component.cells) + 1)))
+    expected = brute_counts(component, counted)
+
+    assert solver.count_configurations(component, counted=counted) == expected
+    assert solver.count_solutions(component, counted=counted) == expected[0]
+
+
+@pytest.mark.parametrize("seed", range(200))
+def test_forced_cells_match_brute_force(seed):
+    rng = random.Random(seed)
+    component = random_component(rng, feasible=rng.random() < 0.8)
+    expected = brute_forced(component)
+
+    result = solver.forced_cells(component)
+    if expected is None:
+        assert result is None
+    else:
+        assert sorted(result[0]) == expected[0]
+        assert sorted(result[1]) == expected[1]
+
+
+@pytest.mark.parametrize("seed", range(200))
+def test_elimination_is_sound(seed):
+    # Elimination finds a subset of the forced cells, never a wrong one
+    rng = random.Random(seed)
+    component = random_component(rng)
+    safes, mines = brute_forced(component)
+
+    found_safes, found_mines = linear_solver.forced_cells(component)
+    assert set(found_safes) <= set(safes)
+    assert set(found_mines) <= set(mines)
+
+
+def test_large_components_are_skipped():
+    component = solver.Component(tuple((0, i) for i in range(6)), (((0, 1, 2, 3, 4, 5), 3),))
+    assert solver.count_configurations(component, max_cells=5) is None
+    assert solver.count_solutions(component, max_cells=5) is None
+    assert solver.forced_cells(component, max_cells=5) is None
@@ -0,0 +1,87 @@
+import sys
+import time
+from contextlib import nullcontext
+
+# Verbosity levels, from quiet to chatty
+OFF = 0
+INFO = 1      # one line per move
+DEBUG = 2     # sentences added and derived, deductions
+TRACE = 3     # every pair comparison and the knowledge base after each move
+
+
+class Tracer():
+    """Leveled logging plus optional per-phase timers and counters.
+
+    Messages are %-style templates formatted only when their level is on,
+    so call sites pass arguments instead of f-strings. Hot paths should still
+    guard with `tracer.level >= LEVEL` (or `tracer.stats`) so nothing at all
+    is built while tracing is off.
+    """
+
+    def __init__(self, level=OFF, stats=False, stream=None):
+        self.level = level
+        self.stats = stats
+        self.stream = stream
+        self.counters = {}
+        # phase -> [calls, seconds]
+        self.timings = {}
+
+    def log(self, level, message, *args):
+        if self.level >= level:
+            print(message % args if args else message, file=self.stream or sys.stdout)
+
+    def count(self, name, n=1):
+        if self.stats:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def phase(self, name):
+        if not self.stats:
+            return _NO_PHASE
+        return _Phase(self.timings, name)
+
+    def reset(self):
+        self.counters.clear()
+        self.timings.clear()
+
+    def merge(self, counters, timings):
+        """Fold in counters and timings gathered elsewhere (e.g. a worker)."""
+        for name, n in counters.items():
+            self.counters[name] = self.counters.get(name, 0) + n
+        for name, (calls, seconds) in timings.items():
+            timing = self.timings.setdefault(name, [0, 0.0])
+            timing[0] += calls
+            timing[1] += seconds
+
+    def report(self):
+        lines = []
+        for name in sorted(self.counters):
+            lines.append(f"{name}: {self.counters[name]}")
+        for name in sorted(self.timings):
+            calls, seconds = self.timings[name]
+            lines.append(f"{name}: {calls} calls, {seconds * 1e3:.3f} ms total")
+        return "\n".join(lines)
+
+
+class _Phase():
+
+    __slots__ = ("timings", "name", "start")
+
+    def __init__(self, timings, name):
+        self.timings = timings
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        timing = self.timings.setdefault(self.name, [0, 0.0])
+        timing[0] += 1
+        timing[1] += time.perf_counter() - self.start
+        return False
+
+
+_NO_PHASE = nullcontext()
+
+# Shared by every Minesweeper and MinesweeperAI built without a tracer of their own
+DEFAULT = Tracer()